@@ -7,11 +7,27 @@ the VM agent from running correctly.
 """
 
 import os
+import stat
 import sys
 import subprocess
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+import importlib.metadata
 import importlib.util
 
+# Required modules mapped to the distribution that provides them
+REQUIRED_MODULES = {
+    'aiofiles': 'aiofiles',
+    'aiohttp': 'aiohttp',
+    'aiohttp_cors': 'aiohttp-cors',
+    'yaml': 'PyYAML',
+    'cryptography': 'cryptography',
+    'psutil': 'psutil',
+    'websockets': 'websockets',
+    'jwt': 'PyJWT',
+    'paramiko': 'paramiko',
+    'click': 'click',
+}
+
 def print_header(title):
     """Print a formatted header"""
     print(f"\n{'='*60}")
@@ -36,28 +52,39 @@ def check_python_installation():
     else:
         print("ℹ️  Using system Python (no virtual environment)")
 
+def _probe_module(module):
+    """Import a module, so broken C extensions and missing shared libraries show up, and read its version"""
+    try:
+        spec = importlib.util.find_spec(module)
+        if spec is None:
+            return module, False, None, None, None
+        imported = importlib.import_module(module)
+        try:
+            version = importlib.metadata.version(REQUIRED_MODULES[module])
+        except importlib.metadata.PackageNotFoundError:
+            version = getattr(imported, '__version__', 'unknown')
+        return module, True, version, getattr(imported, '__file__', None) or spec.origin, None
+    except (ImportError, OSError) as e:
+        return module, True, None, None, e
+    except Exception as e:
+        return module, False, None, None, e
+
 def check_required_modules():
     """Check if required modules can be imported"""
     print_header("Required Modules")
     
-    required_modules = [
-        'aiofiles', 'aiohttp', 'aiohttp_cors', 'yaml', 'cryptography',
-        'psutil', 'websockets', 'pyjwt', 'paramiko', 'click'
-    ]
+    # Imports release the GIL while reading files and loading extensions, so
+    # probing in parallel still helps
+    with ThreadPoolExecutor(max_workers=len(REQUIRED_MODULES)) as pool:
+        results = list(pool.map(_probe_module, REQUIRED_MODULES))
     
-    for module in required_modules:
-        try:
-            spec = importlib.util.find_spec(module)
-            if spec is None:
-                print(f"❌ {module} - Not found")
-            else:
-                # Try to actually import it
-                imported = importlib.import_module(module)
-                version = getattr(imported, '__version__', 'unknown')
-                location = getattr(spec, 'origin', 'unknown')
-                print(f"✅ {module} ({version}) - {location}")
-        except Exception as e:
-            print(f"❌ {module} - Import error: {e}")
+    for module, found, version, location, error in results:
+        if error is not None:
+            print(f"❌ {module} - Import error: {error}")
+        elif not found:
+            print(f"❌ {module} - Not found")
+        else:
+            print(f"✅ {module} ({version}) - {location}")
 
 def check_vm_agent():
     """Check if vm_agent can be imported"""
@@ -105,21 +132,24 @@ def check_installation_paths():
     ]
     
     for path in paths_to_check:
-        path_obj = Path(path)
-        if path_obj.exists():
-            if path_obj.is_file():
-                print(f"✅ {path} (file)")
-                if path.endswith('.sh'):
-                    try:
-                        with open(path, 'r') as f:
-                            first_lines = f.read(500)
-                            print(f"   Preview: {first_lines[:100]}...")
-                    except:
-                        pass
-            else:
-                print(f"✅ {path} (directory)")
-        else:
+        # One stat per path answers both "exists?" and "file or directory?"
+        try:
+            st = os.stat(path)
+        except OSError:
             print(f"❌ {path} (not found)")
+            continue
+        
+        if stat.S_ISREG(st.st_mode):
+            print(f"✅ {path} (file)")
+            if path.endswith('.sh'):
+                try:
+                    with open(path, 'rb') as f:
+                        preview = f.read(100).decode('utf-8', errors='replace')
+                    print(f"   Preview: {preview}...")
+                except OSError:
+                    pass
+        else:
+            print(f"✅ {path} (directory)")
 
 def check_systemd_service():
     """Check systemd service status"""
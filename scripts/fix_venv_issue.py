@@ -16,7 +16,9 @@ import subprocess
 import shutil
 from pathlib import Path
 import argparse
+import importlib
 import logging
+import re
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(message)s')
@@ -32,31 +34,69 @@ REQUIRED_PACKAGES = [
     'websockets>=11.0',
 ]
 
+# Keep pip non-interactive and quiet, and install prebuilt wheels only so
+# cryptography/psutil are never compiled from source on the VM
+PIP_INSTALL_FLAGS = [
+    '--no-input',
+    '--disable-pip-version-check',
+    '--no-color',
+    '-q',
+    '--only-binary=:all:',
+]
+
 VENV_PATH = Path("/root/vm_ai_agent/venv")
 SERVICE_FILE = Path("/etc/systemd/system/vm-agent.service")
 
-def run_command(cmd, check=True):
-    """Run a command and return the result"""
+# ExecStart assignment, including optional spaces around '=' and backslash continuations
+EXEC_START_RE = re.compile(r'^[ \t]*ExecStart[ \t]*=(?:.*\\\n)*.*$', re.MULTILINE)
+
+def run_command(argv, check=True):
+    """Run a command given as an argument list and return the result"""
     try:
-        result = subprocess.run(cmd, shell=True, capture_output=True, text=True, check=check)
-        return result.stdout.strip(), result.stderr.strip(), result.returncode
+        result = subprocess.run(argv, capture_output=True, text=True, check=check)
+        return result.stdout, result.stderr, result.returncode
     except subprocess.CalledProcessError as e:
-        return e.stdout.strip(), e.stderr.strip(), e.returncode
+        return e.stdout, e.stderr, e.returncode
+    except FileNotFoundError as e:
+        return "", str(e), 127
+
+# Import check results keyed by interpreter path
+_import_checks = {}
+
+def _in_process_imports_ok():
+    """Check the required imports inside the running interpreter"""
+    importlib.invalidate_caches()
+    try:
+        for module in ('aiofiles', 'aiohttp', 'vm_agent'):
+            importlib.import_module(module)
+        return True
+    except Exception:
+        return False
 
-def check_python_imports(python_path):
+def check_python_imports(python_path, refresh=False):
     """Check if Python can import required modules"""
-    test_cmd = f"{python_path} -c 'import aiofiles, aiohttp, vm_agent; print(\"SUCCESS\")'"
-    stdout, stderr, returncode = run_command(test_cmd, check=False)
-    return returncode == 0
+    if not refresh and python_path in _import_checks:
+        return _import_checks[python_path]
+    
+    if os.path.abspath(python_path) == os.path.abspath(sys.executable):
+        # No need to start a second copy of the interpreter we are already running
+        ok = _in_process_imports_ok()
+    else:
+        stdout, stderr, returncode = run_command(
+            [python_path, "-c", "import aiofiles, aiohttp, vm_agent"], check=False
+        )
+        ok = returncode == 0
+    
+    _import_checks[python_path] = ok
+    return ok
 
 def install_system_wide():
     """Install dependencies system-wide"""
     logger.info("🔧 Installing dependencies system-wide...")
     
-    packages = ' '.join(REQUIRED_PACKAGES)
-    cmd = f"pip3 install {packages}"
+    cmd = ["pip3", "install", *PIP_INSTALL_FLAGS, *REQUIRED_PACKAGES]
     
-    logger.info(f"Running: {cmd}")
+    logger.info(f"Running: {' '.join(cmd)}")
     stdout, stderr, returncode = run_command(cmd)
     
     if returncode == 0:
@@ -79,8 +119,8 @@ def recreate_virtual_environment():
     VENV_PATH.parent.mkdir(parents=True, exist_ok=True)
     
     # Create new virtual environment
-    cmd = f"python3 -m venv {VENV_PATH}"
-    logger.info(f"Running: {cmd}")
+    cmd = ["python3", "-m", "venv", str(VENV_PATH)]
+    logger.info(f"Running: {' '.join(cmd)}")
     stdout, stderr, returncode = run_command(cmd)
     
     if returncode != 0:
@@ -89,10 +129,9 @@ def recreate_virtual_environment():
     
     # Install dependencies in venv
     pip_path = VENV_PATH / "bin" / "pip"
-    packages = ' '.join(REQUIRED_PACKAGES)
-    cmd = f"{pip_path} install {packages}"
+    cmd = [str(pip_path), "install", *PIP_INSTALL_FLAGS, *REQUIRED_PACKAGES]
     
-    logger.info(f"Installing packages in venv: {cmd}")
+    logger.info(f"Installing packages in venv: {' '.join(cmd)}")
     stdout, stderr, returncode = run_command(cmd)
     
     if returncode == 0:
@@ -112,20 +151,23 @@ def update_systemd_service(python_path):
     with open(SERVICE_FILE, 'r') as f:
         content = f.read()
     
-    # Update ExecStart line
-    lines = content.split('\n')
-    for i, line in enumerate(lines):
-        if line.strip().startswith('ExecStart='):
-            lines[i] = f"ExecStart={python_path} -m vm_agent.server"
-            break
+    exec_start = f"ExecStart={python_path} -m vm_agent.server"
+    match = EXEC_START_RE.search(content)
+    if not match:
+        logger.error(f"❌ No ExecStart entry found in {SERVICE_FILE}")
+        return False
+    
+    # Nothing to do, and no reason to make systemd reload its units
+    if match.group(0).strip() == exec_start:
+        logger.info(f"✅ Systemd service already uses: {python_path}")
+        return True
     
     # Write updated service file
-    new_content = '\n'.join(lines)
     with open(SERVICE_FILE, 'w') as f:
-        f.write(new_content)
+        f.write(content[:match.start()] + exec_start + content[match.end():])
     
     # Reload systemd
-    run_command("systemctl daemon-reload")
+    run_command(["systemctl", "daemon-reload"])
     logger.info(f"✅ Updated systemd service to use: {python_path}")
     return True
 
@@ -153,23 +195,23 @@ def main():
     if args.system_wide:
         logger.info("\n🎯 Strategy: Install dependencies system-wide")
         success = install_system_wide()
-        if success and check_python_imports(system_python):
+        if success and check_python_imports(system_python, refresh=True):
             success = update_systemd_service(system_python)
     else:
         logger.info("\n🎯 Strategy: Recreate virtual environment")
         success = recreate_virtual_environment()
-        if success and check_python_imports(str(venv_python)):
+        if success and check_python_imports(str(venv_python), refresh=True):
             success = update_systemd_service(str(venv_python))
     
     if success:
         logger.info("\n✅ Fix completed successfully!")
         logger.info("🔄 Restarting vm-agent service...")
-        run_command("systemctl restart vm-agent")
+        run_command(["systemctl", "restart", "vm-agent"])
         
         # Check final status
         logger.info("📊 Final Status Check:")
-        stdout, stderr, returncode = run_command("systemctl is-active vm-agent", check=False)
-        if returncode == 0 and stdout == "active":
+        stdout, stderr, returncode = run_command(["systemctl", "is-active", "vm-agent"], check=False)
+        if returncode == 0 and stdout.strip() == "active":
             logger.info("✅ VM Agent service is now running!")
         else:
             logger.warning("⚠️  Service may still have issues. Check with: systemctl status vm-agent")
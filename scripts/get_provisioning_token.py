@@ -7,17 +7,71 @@ for VM agent enrollment. Supports both interactive and command-line modes.
 """
 
 import argparse
+import asyncio
+import hashlib
+import hmac
 import json
+import os
 import sys
+import time
 import getpass
 from pathlib import Path
-from datetime import datetime, timedelta
-import requests
-from typing import Dict, Any, Optional
-import urllib3
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import importlib.util
+import httpx
+from typing import Dict, Any, List, Optional
 
-# Disable SSL warnings for development (remove in production)
-urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+# orjson is much faster for request and response bodies; json is the fallback
+try:
+    import orjson
+    _dumps = orjson.dumps
+    _loads = orjson.loads
+except ImportError:
+    def _dumps(data: Any) -> bytes:
+        return json.dumps(data).encode()
+    _loads = json.loads
+
+# Organization lists rarely change between runs, so they are cached on disk
+ORG_CACHE_DIR = Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "vm_agent"
+ORG_CACHE_TTL = 300  # seconds before the backend is asked again
+
+# Layout of the token files saved by interactive mode
+TOKEN_FILE_TEMPLATE = """\
+# Provisioning Token for {org_name}
+# Created: {created}
+# Expires: {expires}
+# Organization ID: {org_id}
+
+TOKEN={token}
+
+# Installation command:
+# {install_command}
+"""
+
+# Backend responses worth retrying, with exponential backoff between attempts
+RETRY_STATUSES = frozenset({502, 503, 504})
+RETRY_ATTEMPTS = 3
+RETRY_BACKOFF = 0.3  # seconds
+
+
+@lru_cache(maxsize=8)
+def _token_times(now: datetime, expires_in_hours: int):
+    """Default token name stamp and UTC expiry for a creation time"""
+    stamp = now.astimezone().strftime('%Y-%m-%d %H:%M')
+    expires_at = (now + timedelta(hours=expires_in_hours)).replace(tzinfo=None).isoformat()
+    return stamp, expires_at
+
+
+def _positive_int(value: str) -> int:
+    """argparse type for options that must be at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 
 class ProvisioningTokenClient:
@@ -26,139 +80,273 @@ class ProvisioningTokenClient:
     def __init__(self, backend_url: str, verify_ssl: bool = True):
         self.backend_url = backend_url.rstrip('/')
         self.verify_ssl = verify_ssl
-        self.session = requests.Session()
-        self.session.verify = verify_ssl
+        # Multiplex concurrent calls over one HTTP/2 connection when h2 is installed
+        self.http2 = importlib.util.find_spec("h2") is not None
+        # One pooled client so every backend call reuses the same connections;
+        # the transport retries failed connection attempts with backoff
+        transport = httpx.AsyncHTTPTransport(
+            verify=verify_ssl,
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=60
+            ),
+            retries=3
+        )
+        self.client = httpx.AsyncClient(
+            base_url=self.backend_url,
+            transport=transport,
+            headers={"Connection": "keep-alive"},
+            timeout=30
+        )
+        # Who the organization cache belongs to, set by whichever authentication succeeds
+        self._identity = ""
+    
+    async def close(self):
+        """Close the pooled backend connections"""
+        await self.client.aclose()
+    
+    async def __aenter__(self) -> "ProvisioningTokenClient":
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
         
-    def authenticate(self, username: str, password: str) -> bool:
-        """Authenticate with the backend and get access token"""
-        try:
-            response = self.session.post(
-                f"{self.backend_url}/api/v1/auth/login",
-                json={"username": username, "password": password},
-                timeout=30
-            )
-            
-            if response.status_code == 200:
-                data = response.json()
-                access_token = data.get("access_token")
-                if access_token:
-                    self.session.headers.update({
-                        "Authorization": f"Bearer {access_token}"
-                    })
-                    print("✅ Authentication successful")
-                    return True
+    async def _request(
+        self,
+        method: str,
+        path: str,
+        action: str,
+        expected: tuple = (200,),
+        **kwargs
+    ) -> Optional[httpx.Response]:
+        """Send a backend request, returning the response or None after reporting the failure"""
+        if "json" in kwargs:
+            kwargs["content"] = _dumps(kwargs.pop("json"))
+            kwargs["headers"] = {**kwargs.get("headers", {}), "Content-Type": "application/json"}
+        
+        for attempt in range(RETRY_ATTEMPTS + 1):
+            try:
+                response = await self.client.request(method, path, **kwargs)
+            except httpx.HTTPError as e:
+                print(f"❌ {action} error: {e}")
+                return None
             
-            print(f"❌ Authentication failed: {response.status_code}")
+            # Gateway errors are transient; only idempotent requests are replayed
+            if (response.status_code in RETRY_STATUSES and method in ("GET", "HEAD")
+                    and attempt < RETRY_ATTEMPTS):
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** attempt)
+                continue
+            break
+        
+        if response.status_code not in expected:
+            print(f"❌ {action} failed: {response.status_code}")
             if response.text:
                 print(f"   Error: {response.text}")
+            return None
+        return response
+    
+    @staticmethod
+    def _json(response: Optional[httpx.Response], action: str) -> Dict[str, Any]:
+        """Decode a JSON response body, or {} for a failed request or malformed body"""
+        if response is None:
+            return {}
+        try:
+            return _loads(response.content)
+        except ValueError as e:
+            print(f"❌ {action} error: invalid JSON response: {e}")
+            return {}
+    
+    async def authenticate(self, username: str, password: str) -> bool:
+        """Authenticate with the backend and get access token"""
+        response = await self._request(
+            "POST", "/api/v1/auth/login", "Authentication",
+            json={"username": username, "password": password}
+        )
+        if response is None:
             return False
-            
-        except Exception as e:
-            print(f"❌ Authentication error: {e}")
+        
+        access_token = self._json(response, "Authentication").get("access_token")
+        if not access_token:
+            print("❌ Authentication failed: no access token in response")
             return False
+        
+        self.client.headers.update({
+            "Authorization": f"Bearer {access_token}"
+        })
+        self._identity = f"user:{username}"
+        print("✅ Authentication successful")
+        return True
     
-    def authenticate_with_api_key(self, api_key: str) -> bool:
+    async def authenticate_with_api_key(self, api_key: str) -> bool:
         """Authenticate using API key"""
-        try:
-            self.session.headers.update({
-                "X-API-Key": api_key,
-                "Content-Type": "application/json"
-            })
-            
-            # Test the API key with a simple request
-            response = self.session.get(f"{self.backend_url}/api/v1/health")
-            if response.status_code == 200:
-                print("✅ API key authentication successful")
-                return True
-            else:
-                print(f"❌ API key authentication failed: {response.status_code}")
-                return False
-                
-        except Exception as e:
-            print(f"❌ API key authentication error: {e}")
+        self.client.headers.update({
+            "X-API-Key": api_key,
+            "Content-Type": "application/json"
+        })
+        
+        # Test the API key with a cheap request; the body is never decoded,
+        # only read off the socket so the connection goes back to the pool
+        # for the calls that follow
+        response = await self._request("GET", "/api/v1/health", "API key authentication", timeout=5)
+        if response is None:
             return False
+        
+        self._identity = f"api-key:{api_key}"
+        print("✅ API key authentication successful")
+        return True
+    
+    def _org_cache_path(self) -> Path:
+        """Cache file for this backend; one file per backend, whoever is logged in"""
+        digest = hashlib.sha256(self.backend_url.encode()).hexdigest()[:16]
+        return ORG_CACHE_DIR / f"orgs-{digest}.json"
     
-    def list_organizations(self) -> Dict[str, Any]:
-        """List available organizations"""
+    def _org_cache_owner(self, salt: bytes) -> str:
+        """Salted HMAC of the authenticated identity, stored inside the cache file"""
+        return hmac.new(salt, self._identity.encode(), hashlib.sha256).hexdigest()
+    
+    def _owns_org_cache(self, cached: Dict[str, Any]) -> bool:
+        """Whether a loaded cache file was written for the authenticated identity"""
+        owner = self._org_cache_owner(bytes.fromhex(cached["salt"]))
+        return hmac.compare_digest(owner, cached["owner"])
+    
+    def _save_org_cache(self, cache_path: Path, etag: Optional[str], data: Dict[str, Any]):
+        """Atomically replace the organization cache file"""
         try:
-            response = self.session.get(f"{self.backend_url}/api/v1/organizations")
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"❌ Failed to list organizations: {response.status_code}")
-                return {}
-                
-        except Exception as e:
-            print(f"❌ Error listing organizations: {e}")
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = cache_path.with_suffix(".tmp")
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "wb") as f:
+                salt = os.urandom(16)
+                f.write(_dumps({
+                    "salt": salt.hex(), "owner": self._org_cache_owner(salt), "etag": etag, "data": data
+                }))
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass  # Caching is best effort
+    
+    async def list_organizations(self) -> Dict[str, Any]:
+        """List available organizations, served from a short-lived disk cache when fresh"""
+        cache_path = self._org_cache_path()
+        cached = None
+        try:
+            age = time.time() - cache_path.stat().st_mtime
+            cached = _loads(cache_path.read_bytes())
+            if not self._owns_org_cache(cached):
+                # Another user's listing; it is replaced by this user's below
+                cached = None
+            elif age < ORG_CACHE_TTL:
+                return cached["data"]
+        except (OSError, ValueError, KeyError, AttributeError, TypeError):
+            cached = None
+        
+        headers = {}
+        if cached and cached.get("etag"):
+            headers["If-None-Match"] = cached["etag"]
+        response = await self._request(
+            "GET", "/api/v1/organizations", "Organization listing",
+            expected=(200, 304) if cached else (200,), headers=headers
+        )
+        if response is None:
             return {}
+        
+        if response.status_code == 304:
+            # Unchanged: refresh the cache mtime and reuse it
+            try:
+                os.utime(cache_path)
+            except OSError:
+                pass  # Caching is best effort
+            return cached["data"]
+        
+        data = self._json(response, "Organization listing")
+        if data:
+            self._save_org_cache(cache_path, response.headers.get("ETag"), data)
+        return data
     
-    def create_provisioning_token(
+    async def create_provisioning_token(
         self, 
         organization_id: str,
         name: str = None,
         description: str = None,
         expires_in_hours: int = 24,
         max_uses: int = 1,
-        metadata: Dict[str, Any] = None
+        metadata: Dict[str, Any] = None,
+        _now: datetime = None
     ) -> Dict[str, Any]:
-        """Create a new provisioning token"""
+        """Create a new provisioning token; bulk callers share one `_now` (UTC) across calls"""
+        stamp, expires_at = _token_times(_now or datetime.now(timezone.utc), expires_in_hours)
         
         # Prepare token data
         token_data = {
             "organization_id": organization_id,
-            "name": name or f"Manual token - {datetime.now().strftime('%Y-%m-%d %H:%M')}",
+            "name": name or f"Manual token - {stamp}",
             "description": description or "Manually generated provisioning token",
-            "expires_at": (datetime.utcnow() + timedelta(hours=expires_in_hours)).isoformat(),
+            "expires_at": expires_at,
             "max_uses": max_uses,
             "metadata": metadata or {}
         }
         
-        try:
-            response = self.session.post(
-                f"{self.backend_url}/api/v1/organizations/{organization_id}/provisioning-tokens",
-                json=token_data,
-                timeout=30
-            )
-            
-            if response.status_code == 201:
-                return response.json()
-            else:
-                print(f"❌ Failed to create token: {response.status_code}")
-                if response.text:
-                    print(f"   Error: {response.text}")
-                return {}
-                
-        except Exception as e:
-            print(f"❌ Error creating token: {e}")
-            return {}
+        response = await self._request(
+            "POST", f"/api/v1/organizations/{organization_id}/provisioning-tokens",
+            "Token creation", expected=(201,), json=token_data
+        )
+        return self._json(response, "Token creation")
+    
+    async def create_provisioning_tokens_bulk(
+        self,
+        organization_id: str,
+        count: int,
+        concurrency: int = 10,
+        name: str = None,
+        **kwargs
+    ) -> List[Dict[str, Any]]:
+        """Create several provisioning tokens concurrently, returning the ones that succeeded"""
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be at least 1, got {concurrency}")
+        semaphore = asyncio.Semaphore(concurrency)
+        now = datetime.now(timezone.utc)
+        
+        async def create_one(index: int) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.create_provisioning_token(
+                    organization_id,
+                    name=f"{name} #{index}" if name else None,
+                    _now=now,
+                    **kwargs
+                )
+        
+        results = await asyncio.gather(
+            *[create_one(i) for i in range(1, count + 1)],
+            return_exceptions=True
+        )
+        
+        tokens = []
+        for index, result in enumerate(results, 1):
+            if isinstance(result, BaseException):
+                # Backend failures are reported by _request; this is anything else
+                print(f"❌ Token creation #{index} error: {result!r}")
+            elif result:
+                tokens.append(result)
+        return tokens
     
-    def get_provisioning_tokens(self, organization_id: str) -> Dict[str, Any]:
+    async def get_provisioning_tokens(self, organization_id: str) -> Dict[str, Any]:
         """List existing provisioning tokens for an organization"""
-        try:
-            response = self.session.get(
-                f"{self.backend_url}/api/v1/organizations/{organization_id}/provisioning-tokens"
-            )
-            
-            if response.status_code == 200:
-                return response.json()
-            else:
-                print(f"❌ Failed to get tokens: {response.status_code}")
-                return {}
-                
-        except Exception as e:
-            print(f"❌ Error getting tokens: {e}")
-            return {}
+        response = await self._request(
+            "GET", f"/api/v1/organizations/{organization_id}/provisioning-tokens",
+            "Token listing"
+        )
+        return self._json(response, "Token listing")
 
 
-def interactive_mode(client: ProvisioningTokenClient):
+async def interactive_mode(client: ProvisioningTokenClient):
     """Interactive mode for token generation"""
     print("\n🔐 AI-Infra Provisioning Token Generator")
     print("=" * 50)
     
     # List organizations
     print("\n📋 Available Organizations:")
-    orgs_data = client.list_organizations()
+    orgs_data = await client.list_organizations()
     organizations = orgs_data.get("organizations", [])
     
     if not organizations:
@@ -205,7 +393,7 @@ def interactive_mode(client: ProvisioningTokenClient):
     
     # Create token
     print(f"\n🔄 Creating provisioning token...")
-    token_data = client.create_provisioning_token(
+    token_data = await client.create_provisioning_token(
         organization_id=selected_org['id'],
         name=name,
         description=description,
@@ -214,6 +402,12 @@ def interactive_mode(client: ProvisioningTokenClient):
     )
     
     if token_data:
+        token = token_data.get('token')
+        install_command = (
+            f"sudo vm-agent-install --orchestrator-url {client.backend_url} "
+            f"--provisioning-token '{token}'"
+        )
+        
         print("\n✅ Provisioning token created successfully!")
         print("=" * 50)
         print(f"Organization: {selected_org['name']}")
@@ -221,27 +415,29 @@ def interactive_mode(client: ProvisioningTokenClient):
         print(f"Name: {token_data.get('name')}")
         print(f"Expires: {token_data.get('expires_at')}")
         print(f"Max Uses: {token_data.get('max_uses')}")
-        print(f"\n🔑 TOKEN: {token_data.get('token')}")
+        print(f"\n🔑 TOKEN: {token}")
         print("=" * 50)
         print("\n💡 Usage:")
-        print(f"   sudo vm-agent-install --orchestrator-url {client.backend_url} --provisioning-token '{token_data.get('token')}'")
+        print(f"   {install_command}")
         
         # Save to file option
         save_file = input("\nSave token to file? (y/N): ").strip().lower()
         if save_file == 'y':
-            filename = f"provisioning_token_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
+            now = datetime.now()
+            filename = f"provisioning_token_{now.strftime('%Y%m%d_%H%M%S')}.txt"
             with open(filename, 'w') as f:
-                f.write(f"# Provisioning Token for {selected_org['name']}\n")
-                f.write(f"# Created: {datetime.now().isoformat()}\n")
-                f.write(f"# Expires: {token_data.get('expires_at')}\n")
-                f.write(f"# Organization ID: {selected_org['id']}\n\n")
-                f.write(f"TOKEN={token_data.get('token')}\n\n")
-                f.write(f"# Installation command:\n")
-                f.write(f"# sudo vm-agent-install --orchestrator-url {client.backend_url} --provisioning-token '{token_data.get('token')}'\n")
+                f.write(TOKEN_FILE_TEMPLATE.format(
+                    org_name=selected_org['name'],
+                    org_id=selected_org['id'],
+                    created=now.isoformat(),
+                    expires=token_data.get('expires_at'),
+                    token=token,
+                    install_command=install_command
+                ))
             print(f"✅ Token saved to: {filename}")
 
 
-def main():
+async def main():
     parser = argparse.ArgumentParser(
         description="Generate provisioning tokens for VM agent enrollment",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -278,7 +474,7 @@ Examples:
     
     parser.add_argument(
         "--org-id", 
-        help="Organization ID (for non-interactive mode)"
+        help="Organization ID (for non-interactive mode); comma-separated IDs are accepted with --list-tokens"
     )
     parser.add_argument(
         "--name", 
@@ -300,6 +496,18 @@ Examples:
         default=1,
         help="Maximum token uses (default: 1)"
     )
+    parser.add_argument(
+        "--count", 
+        type=_positive_int, 
+        default=1,
+        help="Number of tokens to create (default: 1)"
+    )
+    parser.add_argument(
+        "--concurrency", 
+        type=_positive_int, 
+        default=10,
+        help="Maximum concurrent token requests when --count > 1 (default: 10)"
+    )
     parser.add_argument(
         "--no-ssl-verify", 
         action="store_true",
@@ -317,73 +525,103 @@ Examples:
     
     args = parser.parse_args()
     
-    # Create client
-    client = ProvisioningTokenClient(args.backend_url, verify_ssl=not args.no_ssl_verify)
-    
-    # Authentication
-    if args.api_key:
-        if not client.authenticate_with_api_key(args.api_key):
-            sys.exit(1)
-    else:
-        username = args.username
-        if not username:
-            username = input("Username: ")
-        
-        password = getpass.getpass("Password: ")
-        
-        if not client.authenticate(username, password):
-            sys.exit(1)
-    
-    # List tokens mode
-    if args.list_tokens:
-        if not args.org_id:
-            print("❌ Organization ID required for listing tokens")
-            sys.exit(1)
-        
-        tokens_data = client.get_provisioning_tokens(args.org_id)
-        tokens = tokens_data.get("tokens", [])
-        
-        if tokens:
-            print(f"\n📋 Provisioning Tokens for Organization {args.org_id}:")
-            print("=" * 70)
-            for token in tokens:
-                status = "🟢 Active" if token.get("is_active") else "🔴 Inactive"
-                print(f"ID: {token.get('id')}")
-                print(f"Name: {token.get('name')}")
-                print(f"Status: {status}")
-                print(f"Uses: {token.get('current_uses', 0)}/{token.get('max_uses')}")
-                print(f"Expires: {token.get('expires_at')}")
-                print("-" * 70)
+    # One client, and one connection pool, for every phase of the run
+    async with ProvisioningTokenClient(args.backend_url, verify_ssl=not args.no_ssl_verify) as client:
+        # Authentication
+        if args.api_key:
+            if not await client.authenticate_with_api_key(args.api_key):
+                sys.exit(1)
         else:
-            print("📭 No tokens found for this organization")
-        return
-    
-    # Non-interactive mode
-    if args.org_id:
-        print(f"🔄 Creating provisioning token for organization {args.org_id}...")
+            username = args.username
+            if not username:
+                username = input("Username: ")
+            
+            password = getpass.getpass("Password: ")
+            
+            if not await client.authenticate(username, password):
+                sys.exit(1)
         
-        token_data = client.create_provisioning_token(
-            organization_id=args.org_id,
-            name=args.name,
-            description=args.description,
-            expires_in_hours=args.expires_hours,
-            max_uses=args.max_uses
-        )
+        # List tokens mode
+        if args.list_tokens:
+            if not args.org_id:
+                print("❌ Organization ID required for listing tokens")
+                sys.exit(1)
+            
+            # Fetch every organization's tokens concurrently
+            org_ids = [org_id.strip() for org_id in args.org_id.split(',') if org_id.strip()]
+            results = await asyncio.gather(*[client.get_provisioning_tokens(org_id) for org_id in org_ids])
+            
+            for org_id, tokens_data in zip(org_ids, results):
+                tokens = tokens_data.get("tokens", [])
+                
+                if tokens:
+                    print(f"\n📋 Provisioning Tokens for Organization {org_id}:")
+                    print("=" * 70)
+                    for token in tokens:
+                        status = "🟢 Active" if token.get("is_active") else "🔴 Inactive"
+                        print(f"ID: {token.get('id')}")
+                        print(f"Name: {token.get('name')}")
+                        print(f"Status: {status}")
+                        print(f"Uses: {token.get('current_uses', 0)}/{token.get('max_uses')}")
+                        print(f"Expires: {token.get('expires_at')}")
+                        print("-" * 70)
+                else:
+                    print(f"📭 No tokens found for organization {org_id}")
+            return
         
-        if token_data:
-            print("✅ Token created successfully!")
-            print(f"🔑 TOKEN: {token_data.get('token')}")
+        # Bulk mode
+        if args.org_id and args.count > 1:
+            print(f"🔄 Creating {args.count} provisioning tokens for organization {args.org_id}...")
+            
+            tokens = await client.create_provisioning_tokens_bulk(
+                args.org_id,
+                args.count,
+                concurrency=args.concurrency,
+                name=args.name,
+                description=args.description,
+                expires_in_hours=args.expires_hours,
+                max_uses=args.max_uses
+            )
+            
+            print(f"✅ Created {len(tokens)}/{args.count} tokens")
+            for token_data in tokens:
+                print(f"🔑 TOKEN: {token_data.get('token')}")
             
-            if args.output_file:
+            if args.output_file and tokens:
                 with open(args.output_file, 'w') as f:
-                    f.write(token_data.get('token'))
-                print(f"✅ Token saved to: {args.output_file}")
+                    f.write("".join(f"{token_data.get('token')}\n" for token_data in tokens))
+                print(f"✅ Tokens saved to: {args.output_file}")
+            
+            if len(tokens) < args.count:
+                sys.exit(1)
+            return
+        
+        # Non-interactive mode
+        if args.org_id:
+            print(f"🔄 Creating provisioning token for organization {args.org_id}...")
+            
+            token_data = await client.create_provisioning_token(
+                organization_id=args.org_id,
+                name=args.name,
+                description=args.description,
+                expires_in_hours=args.expires_hours,
+                max_uses=args.max_uses
+            )
+            
+            if token_data:
+                print("✅ Token created successfully!")
+                print(f"🔑 TOKEN: {token_data.get('token')}")
+                
+                if args.output_file:
+                    with open(args.output_file, 'w') as f:
+                        f.write(token_data.get('token'))
+                    print(f"✅ Token saved to: {args.output_file}")
+            else:
+                sys.exit(1)
         else:
-            sys.exit(1)
-    else:
-        # Interactive mode
-        interactive_mode(client)
+            # Interactive mode
+            await interactive_mode(client)
 
 
 if __name__ == "__main__":
-    main() 
\ No newline at end of file
+    asyncio.run(main()) 
\ No newline at end of file
@@ -194,18 +194,21 @@ async def main():
     passed = 0
     total = len(tests)
     
-    for test_name, test_func in tests:
-        logger.info(f"\n--- Running {test_name} Test ---")
-        
-        try:
-            result = await test_func()
-            if result:
-                logger.info(f"✅ {test_name} test PASSED")
-                passed += 1
-            else:
-                logger.error(f"❌ {test_name} test FAILED")
-        except Exception as e:
-            logger.error(f"❌ {test_name} test FAILED with exception: {e}")
+    # Each test uses its own temp directory and port, so they can run concurrently
+    logger.info(f"\n--- Running {', '.join(name for name, _ in tests)} Tests ---")
+    results = await asyncio.gather(
+        *[test_func() for _, test_func in tests],
+        return_exceptions=True
+    )
+    
+    for (test_name, _), result in zip(tests, results):
+        if isinstance(result, BaseException):
+            logger.error(f"❌ {test_name} test FAILED with exception: {result}")
+        elif result:
+            logger.info(f"✅ {test_name} test PASSED")
+            passed += 1
+        else:
+            logger.error(f"❌ {test_name} test FAILED")
     
     logger.info(f"\n🏁 Test Results: {passed}/{total} tests passed")
     
@@ -56,13 +56,14 @@ setup(
         "aiohttp-cors>=0.7.0",
         "aiofiles>=24.1.0",
         "pyyaml>=6.0",
+        "orjson>=3.9.0",
         "cryptography>=3.4.8",
         "psutil>=5.8.0",
         "websockets>=10.0",
         "asyncio-mqtt>=0.11.0",
         "pyjwt>=2.4.0",
         "paramiko>=2.11.0",
-        "mcp>=1.0.0",
+        "mcp>=1.10.0,<1.31",
         "click>=8.0.0",
     ],
     extras_require={
@@ -75,6 +76,10 @@ setup(
             "mypy>=1.0.0",
             "pre-commit>=2.20.0",
         ],
+        "speedups": [
+            "uvloop>=0.17.0; sys_platform != 'win32'",
+            "aiohttp[speedups]>=3.8.0",
+        ],
         "monitoring": [
             "prometheus-client>=0.14.0",
             "grafana-api>=1.0.3",
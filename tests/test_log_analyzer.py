@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+Tests for the LogAnalyzer tool
+"""
+
+import io
+import os
+import threading
+from datetime import datetime
+
+import pytest
+from vm_agent.tools import log_analyzer
+from vm_agent.tools.log_analyzer import LogAnalyzer
+
+
+@pytest.fixture
+def analyzer():
+    """LogAnalyzer with default settings"""
+    return LogAnalyzer({})
+
+
+@pytest.fixture
+def write_log(tmp_path):
+    """Write lines to a temporary log file and return its path"""
+    def write(*lines: str, name: str = 'test.log') -> str:
+        path = tmp_path / name
+        path.write_text(''.join(f"{line}\n" for line in lines))
+        return str(path)
+    return write
+
+
+class TestSearchLogs:
+    """Test cases for streaming search_logs"""
+    
+    async def test_context_around_match(self, analyzer, write_log):
+        """Test before and after context are taken from the neighbouring lines"""
+        path = write_log('a', 'b', 'c MATCH', 'd', 'e', 'f')
+        result = await analyzer.search_logs(path, 'match', context_lines=2)
+        
+        assert result['total_matches'] == 1
+        match, = result['matches']
+        assert match == {
+            'line_number': 3,
+            'matching_line': 'c MATCH',
+            'context_before': ['a', 'b'],
+            'context_after': ['d', 'e']
+        }
+    
+    async def test_overlapping_matches(self, analyzer, write_log):
+        """Test adjacent matches each get their full, overlapping context"""
+        path = write_log('a', 'hit 1', 'hit 2', 'b', 'c')
+        result = await analyzer.search_logs(path, 'hit', context_lines=2)
+        
+        first, second = result['matches']
+        assert first['context_before'] == ['a']
+        assert first['context_after'] == ['hit 2', 'b']
+        assert second['context_before'] == ['a', 'hit 1']
+        assert second['context_after'] == ['b', 'c']
+    
+    async def test_match_inside_after_context(self, analyzer, write_log):
+        """Test a match found while filling another match's after context is reported too"""
+        path = write_log('hit 1', 'x', 'hit 2', 'y', 'z', 'w')
+        result = await analyzer.search_logs(path, 'hit', context_lines=3)
+        
+        first, second = result['matches']
+        assert first['context_after'] == ['x', 'hit 2', 'y']
+        assert second['line_number'] == 3
+        assert second['context_before'] == ['hit 1', 'x']
+        assert second['context_after'] == ['y', 'z', 'w']
+    
+    async def test_max_results_keeps_pending_context(self, analyzer, write_log):
+        """Test the last match still gets its after context once max_results is reached"""
+        path = write_log('hit 1', 'hit 2', 'a', 'hit 3', 'b')
+        result = await analyzer.search_logs(path, 'hit', context_lines=2, max_results=2)
+        
+        assert result['total_matches'] == 2
+        assert [m['line_number'] for m in result['matches']] == [1, 2]
+        assert result['matches'][1]['context_after'] == ['a', 'hit 3']
+    
+    async def test_no_context_lines(self, analyzer, write_log):
+        """Test context_lines=0 returns bare matches"""
+        path = write_log('a', 'hit', 'b', 'hit')
+        result = await analyzer.search_logs(path, 'hit', context_lines=0)
+        
+        assert [m['line_number'] for m in result['matches']] == [2, 4]
+        assert all(m['context_before'] == [] and m['context_after'] == [] for m in result['matches'])
+    
+    async def test_case_sensitivity(self, analyzer, write_log):
+        """Test searches ignore case by default and honour case_sensitive"""
+        path = write_log('Error one', 'ERROR two', 'error three', 'e.r.r.o.r')
+        
+        insensitive = await analyzer.search_logs(path, 'error')
+        sensitive = await analyzer.search_logs(path, 'error', case_sensitive=True)
+        dotted = await analyzer.search_logs(path, 'e.r')
+        
+        assert [m['line_number'] for m in insensitive['matches']] == [1, 2, 3]
+        assert [m['line_number'] for m in sensitive['matches']] == [3]
+        assert [m['line_number'] for m in dotted['matches']] == [4]
+
+
+class TestLogFormats:
+    """Test cases for log format detection and parsing"""
+    
+    LINES = {
+        'apache_common': '127.0.0.1 - frank [10/Oct/2000:13:55:36 -0700] "GET /apache_pb.gif HTTP/1.0" 200 2326',
+        'apache_combined': (
+            '10.0.0.2 - - [10/Oct/2000:13:55:36 -0700] "POST /login HTTP/1.1" 302 512 '
+            '"http://example.com/" "Mozilla/5.0"'
+        ),
+        'nginx': '2024/01/02 03:04:05 [error] 123#0: *1 open() "/srv/x" failed (2: No such file)',
+        'syslog': 'Oct  1 12:00:00 web01 sshd[4242]: Failed password for root from 10.0.0.1',
+    }
+    
+    @pytest.mark.parametrize('log_format', list(LINES))
+    def test_detect_format(self, analyzer, log_format):
+        """Test each supported format is recognised"""
+        assert analyzer._detect_log_format(self.LINES[log_format]) == log_format
+    
+    def test_detect_unknown(self, analyzer):
+        """Test lines in no known format, or with a known one mid-line, are unknown"""
+        assert analyzer._detect_log_format('2024-01-01T00:00:00 INFO started') == 'unknown'
+        assert analyzer._detect_log_format('prefix ' + self.LINES['nginx']) == 'unknown'
+    
+    def test_parse_fields(self, analyzer):
+        """Test parsed fields and timestamps for every format"""
+        entries = analyzer._parse_log_lines(list(self.LINES.values()), 'auto')
+        common, combined, nginx, syslog = entries
+        
+        assert common['format'] == 'apache_common'
+        assert common['parsed']['status'] == '200'
+        assert common['parsed']['user'] == 'frank'
+        assert common['timestamp'] == datetime(2000, 10, 10, 13, 55, 36)
+        assert common['ip_addresses'] == ['127.0.0.1']
+        
+        assert combined['format'] == 'apache_combined'
+        assert combined['parsed']['method'] == 'POST'
+        assert combined['parsed']['user_agent'] == 'Mozilla/5.0'
+        assert combined['timestamp'] == datetime(2000, 10, 10, 13, 55, 36)
+        
+        assert nginx['format'] == 'nginx'
+        assert nginx['parsed']['severity'] == 'error'
+        assert nginx['timestamp'] == datetime(2024, 1, 2, 3, 4, 5)
+        assert nginx['level'] == 'ERROR'
+        
+        assert syslog['format'] == 'syslog'
+        assert syslog['parsed']['process'] == 'sshd'
+        assert syslog['parsed']['pid'] == '4242'
+        assert syslog['timestamp'] == datetime(1900, 10, 1, 12, 0, 0)
+        assert syslog['ip_addresses'] == ['10.0.0.1']
+    
+    def test_explicit_format(self, analyzer):
+        """Test a fixed format only parses lines of that format"""
+        entries = analyzer._parse_log_lines([self.LINES['nginx'], self.LINES['syslog']], 'nginx')
+        assert entries[0]['format'] == 'nginx'
+        assert entries[1]['parsed'] == {}
+
+
+class TestTailFile:
+    """Test cases for _tail_file"""
+    
+    @staticmethod
+    def tail(analyzer, path, num_lines, newline=None):
+        with open(path, 'r', encoding='utf-8', errors='replace', newline=newline) as f:
+            return analyzer._tail_file(f, num_lines)
+    
+    def test_empty_file(self, analyzer, tmp_path):
+        """Test an empty file has no lines"""
+        path = tmp_path / 'empty.log'
+        path.write_bytes(b'')
+        assert self.tail(analyzer, path, 5) == []
+    
+    def test_no_trailing_newline(self, analyzer, tmp_path):
+        """Test the last line is kept when the file does not end with a newline"""
+        path = tmp_path / 'partial.log'
+        path.write_bytes(b'one\ntwo\nthree')
+        assert self.tail(analyzer, path, 2) == ['two', 'three']
+    
+    @pytest.mark.parametrize('newline', [None, ''])
+    def test_crlf_line_endings(self, analyzer, tmp_path, newline):
+        """Test carriage returns are stripped from CRLF lines"""
+        path = tmp_path / 'crlf.log'
+        path.write_bytes(b'one\r\ntwo\r\nthree\r\n')
+        assert self.tail(analyzer, path, 2, newline) == ['two', 'three']
+    
+    def test_blank_lines_skipped(self, analyzer, tmp_path):
+        """Test blank lines do not count towards num_lines"""
+        path = tmp_path / 'blank.log'
+        path.write_bytes(b'one\n\ntwo\n   \nthree\n\n\n')
+        assert self.tail(analyzer, path, 2) == ['two', 'three']
+    
+    def test_more_lines_than_file(self, analyzer, write_log):
+        """Test asking for more lines than exist returns the whole file"""
+        path = write_log('one', 'two', 'three')
+        assert self.tail(analyzer, path, 100) == ['one', 'two', 'three']
+    
+    def test_fifo_falls_back_to_streaming(self, analyzer, tmp_path):
+        """Test a non-mmap-able file is streamed instead"""
+        if not hasattr(os, 'mkfifo'):
+            pytest.skip('FIFOs are not supported on this platform')
+        path = tmp_path / 'pipe.log'
+        os.mkfifo(path)
+        
+        def writer():
+            with open(path, 'wb') as f:
+                f.write(b'one\r\n\ntwo\nthree\nfour')
+        
+        thread = threading.Thread(target=writer)
+        thread.start()
+        try:
+            assert self.tail(analyzer, path, 3) == ['two', 'three', 'four']
+        finally:
+            thread.join()
+    
+    @pytest.mark.parametrize('block_size', [1, 3, 7, 64])
+    def test_lines_spanning_blocks(self, analyzer, tmp_path, monkeypatch, block_size):
+        """Test lines longer than the read block are reassembled, multi-byte text included"""
+        monkeypatch.setattr(log_analyzer, 'TAIL_BLOCK_SIZE', block_size)
+        path = tmp_path / 'long.log'
+        path.write_text('first line\nsecond \u00e9\u00e9 line\n\nthird, the longest line\n', encoding='utf-8')
+        assert self.tail(analyzer, path, 2) == ['second \u00e9\u00e9 line', 'third, the longest line']
+        assert self.tail(analyzer, path, 5) == ['first line', 'second \u00e9\u00e9 line', 'third, the longest line']
+    
+    def test_utf16_file(self, analyzer, tmp_path):
+        """Test encodings where newline is not a single byte are decoded correctly"""
+        path = tmp_path / 'utf16.log'
+        path.write_text('one\ntwo\nthree\n', encoding='utf-16')
+        with open(path, 'r', encoding='utf-16') as f:
+            assert analyzer._tail_file(f, 2) == ['two', 'three']
+    
+    def test_truncated_during_scan(self, analyzer, tmp_path, monkeypatch):
+        """Test a file truncated mid-scan returns the lines read so far instead of crashing"""
+        monkeypatch.setattr(log_analyzer, 'TAIL_BLOCK_SIZE', 8)
+        path = tmp_path / 'rotated.log'
+        path.write_bytes(b'aaa\nbbb\nccc\nddd\n')
+        
+        class TruncatingReader(io.BufferedReader):
+            def read(self, size=-1):
+                data = super().read(size)
+                os.truncate(path, 0)
+                return data
+        
+        with io.TextIOWrapper(TruncatingReader(io.FileIO(path)), encoding='utf-8') as f:
+            assert analyzer._tail_file(f, 3) == ['ddd']
+    
+    def test_stream_without_fileno(self, analyzer):
+        """Test in-memory streams use the streaming fallback"""
+        stream = io.StringIO('one\r\ntwo\n\nthree\n')
+        assert analyzer._tail_file(stream, 2) == ['two', 'three']
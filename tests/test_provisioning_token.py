@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Tests for the provisioning token script
+"""
+
+import hashlib
+import os
+import time
+
+import httpx
+import orjson
+import pytest
+
+from scripts import get_provisioning_token as gpt
+
+
+ORGS = {"organizations": [{"id": "org-1", "name": "Org One"}]}
+
+
+class MockBackend:
+    """Backend stub that counts organization listings and hands out a new token per login"""
+    
+    def __init__(self, etag='"v1"', orgs=ORGS):
+        self.etag = etag
+        self.orgs = orgs
+        self.logins = 0
+        self.org_requests = []
+    
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path == "/api/v1/auth/login":
+            self.logins += 1
+            return httpx.Response(200, json={"access_token": f"token-{self.logins}"})
+        if request.url.path == "/api/v1/health":
+            return httpx.Response(200)
+        if request.url.path == "/api/v1/organizations":
+            self.org_requests.append(request)
+            if request.headers.get("If-None-Match") == self.etag:
+                return httpx.Response(304)
+            return httpx.Response(200, json=self.orgs, headers={"ETag": self.etag})
+        return httpx.Response(404)
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    """Point the organization cache at a temporary directory"""
+    monkeypatch.setattr(gpt, "ORG_CACHE_DIR", tmp_path)
+    return tmp_path
+
+
+async def login(backend: MockBackend, username: str = "alice") -> gpt.ProvisioningTokenClient:
+    """Client authenticated against the mock backend"""
+    client = gpt.ProvisioningTokenClient("https://backend.test")
+    await client.client.aclose()
+    client.client = httpx.AsyncClient(base_url=client.backend_url, transport=httpx.MockTransport(backend))
+    assert await client.authenticate(username, "secret")
+    return client
+
+
+def expire(cache_dir):
+    """Age every cache file past the TTL"""
+    stale = time.time() - gpt.ORG_CACHE_TTL - 10
+    for path in cache_dir.iterdir():
+        os.utime(path, (stale, stale))
+
+
+class TestOrganizationCache:
+    """Test cases for the on-disk organization listing cache"""
+    
+    async def test_fresh_cache_survives_new_login(self, cache_dir):
+        """Test a fresh cache is reused across runs even though each login gets a new token"""
+        backend = MockBackend()
+        for _ in range(3):
+            async with await login(backend) as client:
+                assert await client.list_organizations() == ORGS
+        
+        assert backend.logins == 3
+        assert len(backend.org_requests) == 1
+        assert len(list(cache_dir.iterdir())) == 1
+    
+    async def test_other_user_does_not_read_cache(self, cache_dir):
+        """Test the cache is not served to a different identity, and is replaced in place"""
+        backend = MockBackend()
+        async with await login(backend, "alice") as client:
+            await client.list_organizations()
+        async with await login(backend, "bob") as client:
+            assert await client.list_organizations() == ORGS
+        
+        assert len(backend.org_requests) == 2
+        assert "If-None-Match" not in backend.org_requests[1].headers
+        assert len(list(cache_dir.iterdir())) == 1
+    
+    async def test_stale_cache_not_modified(self, cache_dir):
+        """Test a stale cache is revalidated with its ETag and reused on 304"""
+        backend = MockBackend()
+        async with await login(backend) as client:
+            await client.list_organizations()
+        expire(cache_dir)
+        
+        async with await login(backend) as client:
+            assert await client.list_organizations() == ORGS
+        
+        assert backend.org_requests[-1].headers["If-None-Match"] == '"v1"'
+        cache_file, = cache_dir.iterdir()
+        assert time.time() - cache_file.stat().st_mtime < gpt.ORG_CACHE_TTL
+    
+    async def test_stale_cache_replaced(self, cache_dir):
+        """Test a stale cache is replaced when the backend returns a new listing"""
+        backend = MockBackend()
+        async with await login(backend) as client:
+            await client.list_organizations()
+        expire(cache_dir)
+        
+        updated = {"organizations": ORGS["organizations"] + [{"id": "org-2", "name": "Org Two"}]}
+        backend.etag, backend.orgs = '"v2"', updated
+        async with await login(backend) as client:
+            assert await client.list_organizations() == updated
+        
+        cache_file, = cache_dir.iterdir()
+        cached = orjson.loads(cache_file.read_bytes())
+        assert cached["etag"] == '"v2"'
+        assert cached["data"] == updated
+    
+    async def test_cache_removed_during_revalidation(self, cache_dir):
+        """Test a cache file that disappears before a 304 still serves the listing"""
+        backend = MockBackend()
+        async with await login(backend) as client:
+            await client.list_organizations()
+        expire(cache_dir)
+        
+        def remove_cache_first(request):
+            if request.url.path == "/api/v1/organizations":
+                for path in cache_dir.iterdir():
+                    path.unlink()
+            return backend(request)
+        
+        async with await login(remove_cache_first) as client:
+            assert await client.list_organizations() == ORGS
+        assert backend.org_requests[-1].headers["If-None-Match"] == '"v1"'
+    
+    async def test_owner_tag_is_salted(self, cache_dir):
+        """Test the cache does not store an unsalted digest of the API key"""
+        api_key = "vm-agent-secret-key"
+        client = gpt.ProvisioningTokenClient("https://backend.test")
+        await client.client.aclose()
+        client.client = httpx.AsyncClient(base_url=client.backend_url, transport=httpx.MockTransport(MockBackend()))
+        async with client:
+            assert await client.authenticate_with_api_key(api_key)
+            await client.list_organizations()
+        
+        raw = next(cache_dir.iterdir()).read_bytes()
+        assert api_key.encode() not in raw
+        assert hashlib.sha256(f"api-key:{api_key}".encode()).hexdigest().encode() not in raw
+        cached = orjson.loads(raw)
+        assert len(bytes.fromhex(cached["salt"])) == 16
+
+
+class TestBulkCreation:
+    """Test cases for concurrent token creation"""
+    
+    @pytest.mark.parametrize("value", ["0", "-1", "x"])
+    def test_concurrency_must_be_positive(self, value):
+        """Test --concurrency values below 1 are rejected instead of hanging"""
+        with pytest.raises(gpt.argparse.ArgumentTypeError):
+            gpt._positive_int(value)
+    
+    @pytest.mark.parametrize("option", ["--count", "--concurrency"])
+    @pytest.mark.parametrize("value", ["0", "-5"])
+    async def test_cli_rejects_non_positive(self, monkeypatch, capsys, option, value):
+        """Test --count and --concurrency below 1 are rejected by the argument parser"""
+        monkeypatch.setattr(gpt.sys, "argv", ["get_provisioning_token.py", "--backend-url", "https://backend.test", option, value])
+        with pytest.raises(SystemExit) as exc_info:
+            await gpt.main()
+        assert exc_info.value.code == 2
+        assert option in capsys.readouterr().err
+    
+    async def test_unexpected_errors_are_reported(self, capsys):
+        """Test exceptions from individual creations are printed, not silently dropped"""
+        client = gpt.ProvisioningTokenClient("https://backend.test")
+        calls = []
+        
+        async def create(organization_id, **kwargs):
+            calls.append(kwargs["name"])
+            if len(calls) == 2:
+                raise RuntimeError("boom")
+            return {"token": f"t{len(calls)}"}
+        
+        client.create_provisioning_token = create
+        async with client:
+            tokens = await client.create_provisioning_tokens_bulk("org-1", 3, concurrency=1, name="n")
+        
+        assert tokens == [{"token": "t1"}, {"token": "t3"}]
+        assert "#2 error: RuntimeError('boom')" in capsys.readouterr().out
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+Tests for VM Agent Server MCP endpoint
+"""
+
+import asyncio
+import os
+import threading
+import pytest
+import orjson
+import yaml
+from aiohttp.test_utils import TestClient, TestServer
+from vm_agent import server as server_module
+from vm_agent.server import LARGE_RESULT_SIZE, VMAgentServer, _acquire_within
+
+
+@pytest.fixture
+async def mcp_client():
+    """HTTP client bound to a VM agent app with authentication bypassed"""
+    server = VMAgentServer(
+        server={'host': '127.0.0.1', 'port': 0, 'ssl': {'enabled': False}},
+        orchestrator={'url': None}
+    )
+    server.security_manager.verify_api_key = lambda api_key: True
+    
+    async with TestClient(TestServer(await server.create_app())) as client:
+        yield client
+
+
+class TestMCPEndpoint:
+    """Test cases for the /mcp JSON-RPC endpoint"""
+    
+    async def test_tools_list(self, mcp_client):
+        """Test tools/list returns the registered tools"""
+        response = await mcp_client.post('/mcp', data=orjson.dumps({'id': 1, 'method': 'tools/list'}))
+        data = orjson.loads(await response.read())
+        
+        assert response.status == 200
+        assert data['id'] == 1
+        names = [tool['name'] for tool in data['result']['tools']]
+        assert 'execute_shell_command' in names
+    
+    async def test_method_not_found(self, mcp_client):
+        """Test unknown methods return a JSON-RPC error"""
+        response = await mcp_client.post('/mcp', data=orjson.dumps({'id': 2, 'method': 'nope'}))
+        data = orjson.loads(await response.read())
+        
+        assert response.status == 404
+        assert data['error']['code'] == -32601
+    
+    async def test_batch_request(self, mcp_client):
+        """Test batch requests answer every call except notifications"""
+        batch = [
+            {'jsonrpc': '2.0', 'id': 1, 'method': 'tools/list'},
+            {'jsonrpc': '2.0', 'id': 2, 'method': 'nope'},
+            {'jsonrpc': '2.0', 'method': 'tools/list'},
+        ]
+        response = await mcp_client.post('/mcp', data=orjson.dumps(batch))
+        data = orjson.loads(await response.read())
+        
+        assert response.status == 200
+        assert [item['id'] for item in data] == [1, 2]
+        assert 'result' in data[0]
+        assert data[1]['error']['code'] == -32601
+    
+    async def test_empty_batch(self, mcp_client):
+        """Test empty batches are rejected"""
+        response = await mcp_client.post('/mcp', data=b'[]')
+        data = orjson.loads(await response.read())
+        
+        assert response.status == 400
+        assert data['error']['code'] == -32600
+    
+    async def test_parse_error(self, mcp_client):
+        """Test malformed JSON returns the JSON-RPC parse error"""
+        response = await mcp_client.post('/mcp', data=b'{not json')
+        data = orjson.loads(await response.read())
+        
+        assert response.status == 400
+        assert data['error']['code'] == -32700
+    
+    async def test_unknown_tool(self, mcp_client):
+        """Test calls to unregistered tools are rejected as invalid params"""
+        request = {'id': 3, 'method': 'tools/call', 'params': {'name': 'nope', 'arguments': {}}}
+        response = await mcp_client.post('/mcp', data=orjson.dumps(request))
+        data = orjson.loads(await response.read())
+        
+        assert response.status == 404
+        assert data['error']['code'] == -32602
+    
+    async def test_invalid_tool_arguments(self, mcp_client):
+        """Test arguments that fail the tool schema are reported as invalid params"""
+        request = {
+            'id': 4,
+            'method': 'tools/call',
+            'params': {'name': 'read_file', 'arguments': {'file_path': 3}}
+        }
+        response = await mcp_client.post('/mcp', data=orjson.dumps(request))
+        data = orjson.loads(await response.read())
+        
+        assert response.status == 400
+        assert data['error']['code'] == -32602
+        assert 'file_path' in data['error']['message']
+    
+    async def test_tools_call_result_shape(self, mcp_client):
+        """Test tools/call returns compact JSON text mirroring the structured result"""
+        request = {
+            'id': 5,
+            'method': 'tools/call',
+            'params': {'name': 'execute_shell_command', 'arguments': {'command': 'echo hi'}}
+        }
+        response = await mcp_client.post('/mcp', data=orjson.dumps(request))
+        data = orjson.loads(await response.read())
+        
+        assert response.status == 200
+        result = data['result']
+        assert set(result) == {'content', 'structuredContent', 'isError'}
+        assert result['isError'] is False
+        assert result['structuredContent']['stdout'] == 'hi\n'
+        assert result['structuredContent']['vm_id']
+        
+        block, = result['content']
+        assert block['type'] == 'text'
+        assert '\n  ' not in block['text']
+        assert orjson.loads(block['text']) == result['structuredContent']
+    
+    def test_tool_result_timestamp_is_exact(self):
+        """Test tool results carry the current time, not the coarse /health timestamp"""
+        server = VMAgentServer(
+            server={'host': '127.0.0.1', 'port': 0, 'ssl': {'enabled': False}},
+            orchestrator={'url': None}
+        )
+        server._timestamp_iso = '2000-01-01T00:00:00'
+        server._timestamp_expires = float('inf')
+        
+        assert server._add_vm_context({})['timestamp'] != '2000-01-01T00:00:00'
+        assert server._timestamp() == '2000-01-01T00:00:00'
+    
+    async def test_fastmcp_internals_match_call_tool(self):
+        """Test the FastMCP internals used by tools/call still exist and agree with call_tool"""
+        server = VMAgentServer(
+            server={'host': '127.0.0.1', 'port': 0, 'ssl': {'enabled': False}},
+            orchestrator={'url': None}
+        )
+        
+        @server.mcp.tool()
+        def greet(name: str) -> str:
+            return f"hello {name}"
+        
+        tool, result = await server._call_mcp_tool('greet', {'name': 'vm'})
+        assert result == 'hello vm'
+        
+        public = await server.mcp.call_tool('greet', {'name': 'vm'})
+        content, structured = public if isinstance(public, tuple) else (public, None)
+        expected = {
+            'content': [block.model_dump(mode='json', by_alias=True, exclude_none=True) for block in content],
+            'isError': False
+        }
+        if structured is not None:
+            expected['structuredContent'] = structured
+        assert server._tools_call_result(tool, result) == expected
+    
+    async def test_large_result_encoded_off_loop(self, mcp_client, monkeypatch):
+        """Test large tool results are encoded entirely in a worker thread"""
+        threads = []
+        encode = VMAgentServer._encode_tools_call
+        
+        def spy(self, *args):
+            threads.append(threading.current_thread())
+            return encode(self, *args)
+        
+        monkeypatch.setattr(VMAgentServer, '_encode_tools_call', spy)
+        for size in (LARGE_RESULT_SIZE + 1, 10):
+            request = {
+                'id': 6,
+                'method': 'tools/call',
+                'params': {
+                    'name': 'execute_shell_command',
+                    'arguments': {'command': f"head -c {size} /dev/zero | tr '\\0' x"}
+                }
+            }
+            response = await mcp_client.post('/mcp', data=orjson.dumps(request))
+            data = orjson.loads(await response.read())
+            assert response.status == 200
+            assert data['result']['structuredContent']['stdout'] == 'x' * size
+        
+        assert threads[0] is not threading.main_thread()
+        assert threads[1] is threading.main_thread()
+
+
+class TestToolSlots:
+    """Test cases for acquiring tool concurrency permits"""
+    
+    async def test_free_permit(self):
+        """Test a free permit is taken immediately"""
+        semaphore = asyncio.Semaphore(1)
+        assert await _acquire_within(semaphore, 0.01)
+        assert semaphore.locked()
+    
+    async def test_timeout_keeps_permit_count(self):
+        """Test a timed-out wait does not consume the permit it was waiting for"""
+        semaphore = asyncio.Semaphore(1)
+        await semaphore.acquire()
+        
+        assert not await _acquire_within(semaphore, 0.01)
+        semaphore.release()
+        await asyncio.sleep(0)
+        assert not semaphore.locked()
+    
+    async def test_cancel_racing_acquire_releases_permit(self):
+        """Test a permit handed over in the same tick the caller is cancelled is given back"""
+        semaphore = asyncio.Semaphore(1)
+        await semaphore.acquire()
+        waiter = asyncio.ensure_future(_acquire_within(semaphore, 10))
+        await asyncio.sleep(0)
+        
+        semaphore.release()
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        await asyncio.sleep(0)
+        assert not semaphore.locked()
+
+
+def load_config(path):
+    """Run _load_config without constructing the rest of the server"""
+    return VMAgentServer._load_config(VMAgentServer.__new__(VMAgentServer), str(path))
+
+
+class TestConfigCache:
+    """Test cases for the parsed config JSON sidecar"""
+    
+    @staticmethod
+    def tamper(cache_path, **changes):
+        """Rewrite the cached config while keeping the recorded mtime and size"""
+        cached = orjson.loads(cache_path.read_bytes())
+        cached['config'].update(changes)
+        cache_path.write_bytes(orjson.dumps(cached))
+    
+    def test_cache_reused_while_unchanged(self, tmp_path):
+        """Test the sidecar is written and then served instead of the YAML"""
+        config_path = tmp_path / 'agent.yaml'
+        config_path.write_text('agent:\n  name: one\n')
+        cache_path = tmp_path / ('agent.yaml' + server_module.CONFIG_CACHE_SUFFIX)
+        
+        assert load_config(config_path) == {'agent': {'name': 'one'}}
+        assert cache_path.exists()
+        
+        self.tamper(cache_path, cached=True)
+        assert load_config(config_path)['cached'] is True
+    
+    def test_invalidated_on_mtime_change(self, tmp_path):
+        """Test a touched YAML file is re-parsed"""
+        config_path = tmp_path / 'agent.yaml'
+        config_path.write_text('agent:\n  name: one\n')
+        load_config(config_path)
+        self.tamper(tmp_path / ('agent.yaml' + server_module.CONFIG_CACHE_SUFFIX), cached=True)
+        
+        mtime_ns = config_path.stat().st_mtime_ns + 1_000_000_000
+        os.utime(config_path, ns=(mtime_ns, mtime_ns))
+        assert load_config(config_path) == {'agent': {'name': 'one'}}
+    
+    def test_invalidated_on_size_change(self, tmp_path):
+        """Test an edited YAML file is re-parsed even when its mtime is restored"""
+        config_path = tmp_path / 'agent.yaml'
+        config_path.write_text('agent:\n  name: one\n')
+        original = config_path.stat()
+        load_config(config_path)
+        
+        config_path.write_text('agent:\n  name: three\n')
+        os.utime(config_path, ns=(original.st_atime_ns, original.st_mtime_ns))
+        assert load_config(config_path) == {'agent': {'name': 'three'}}
+    
+    def test_env_refs_not_cached(self, tmp_path, monkeypatch):
+        """Test configs referencing ${VAR} are substituted on every load and never cached"""
+        config_path = tmp_path / 'agent.yaml'
+        config_path.write_text('agent:\n  name: ${AGENT_NAME}\n')
+        
+        monkeypatch.setenv('AGENT_NAME', 'first')
+        assert load_config(config_path) == {'agent': {'name': 'first'}}
+        monkeypatch.setenv('AGENT_NAME', 'second')
+        assert load_config(config_path) == {'agent': {'name': 'second'}}
+        assert list(tmp_path.iterdir()) == [config_path]
+    
+    @pytest.mark.parametrize('yaml_text', [
+        'agent:\n  since: 2024-01-02\n',
+        'ports:\n  80: http\n',
+    ])
+    def test_yaml_only_types_not_cached(self, tmp_path, yaml_text):
+        """Test configs JSON cannot round-trip are not cached"""
+        config_path = tmp_path / 'agent.yaml'
+        config_path.write_text(yaml_text)
+        
+        expected = yaml.safe_load(yaml_text)
+        assert load_config(config_path) == expected
+        assert load_config(config_path) == expected
+        assert list(tmp_path.iterdir()) == [config_path]
+    
+    def test_package_configs_not_cached(self, tmp_path, monkeypatch):
+        """Test configs inside the installed package directory are not cached"""
+        monkeypatch.setattr(server_module, '_PACKAGE_DIR', os.path.realpath(tmp_path))
+        config_path = tmp_path / 'config' / 'agent.yaml'
+        config_path.parent.mkdir()
+        config_path.write_text('agent:\n  name: one\n')
+        
+        assert load_config(config_path) == {'agent': {'name': 'one'}}
+        assert list(config_path.parent.iterdir()) == [config_path]
@@ -22,7 +22,7 @@ from typing import Dict, Any, Optional
 import aiohttp
 import subprocess
 
-from .server import VMAgentServer
+from .server import VMAgentServer, run_async
 from .tools import TenantManager, SecurityManager
 
 
@@ -78,7 +78,7 @@ def server(ctx: click.Context, host: str, port: int, ssl: bool, daemon: bool) ->
         await server.run_forever()
     
     try:
-        asyncio.run(run_server())
+        run_async(run_server())
     except KeyboardInterrupt:
         click.echo("\nServer stopped")
     except Exception as e:
@@ -7,44 +7,188 @@ multi-tenant isolation, and comprehensive security features.
 """
 
 import asyncio
-import json
 import os
+import re
 import logging
+import logging.handlers
+import queue
 import sys
+import time
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Union
+from typing import Dict, Any, List, Optional, Tuple
 from pathlib import Path
 import yaml
 import signal
 import argparse
+import orjson
 
 # Import MCP FastMCP server
 try:
     from mcp.server.fastmcp import FastMCP
+    from mcp.server.fastmcp.exceptions import ToolError
+    from pydantic import ValidationError
 except ImportError:
     raise ImportError("MCP library is required. Install with: pip install mcp")
 
-# Import our tool implementations
-from .tools import (
-    ShellExecutor,
-    FileManager, 
-    SystemMonitor,
-    LogAnalyzer,
-    SecurityManager,
-    WebSocketCommandHandler,
-    TenantManager,
-)
+# Import our tool implementations; the tools package resolves its classes on
+# first attribute access, so disabled tools never import their modules
+from . import tools
+from .tools import SecurityManager, TenantManager
 
 # Import aiohttp for HTTP server
 from aiohttp import web
 import aiohttp_cors
 import ssl
-from cryptography import x509
-from cryptography.hazmat.backends import default_backend
+
+# uvloop is an optional drop-in replacement for the default asyncio event loop
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
+# aiohttp falls back to a pure-Python HTTP parser when its llhttp extension is missing
+try:
+    from aiohttp.http_parser import HttpRequestParserC
+except ImportError:
+    HttpRequestParserC = None
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# How long a cached response timestamp may be reused, in seconds
+TIMESTAMP_RESOLUTION = 0.5
+
+# libyaml-backed loader when PyYAML was built with it
+YAML_LOADER = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+
+# Sidecar file holding the parsed config as JSON, next to the YAML source
+CONFIG_CACHE_SUFFIX = '.cache.json'
+
+# Installed package directory; configs shipped inside it are never cached
+_PACKAGE_DIR = os.path.dirname(os.path.realpath(__file__))
+
+# ${VAR} references substituted from the environment in config files
+_ENV_VAR_RE = re.compile(r'\$\{([^}]+)\}')
+
+# Tool results with more text than this are serialized in a worker thread
+LARGE_RESULT_SIZE = 256 * 1024
+
+# Endpoints reachable without an API key
+PUBLIC_PATHS = frozenset({'/health', '/api/v1/ca-certificate'})
+
+# CORS policy shared by every route
+CORS_DEFAULTS = {
+    "*": aiohttp_cors.ResourceOptions(
+        allow_credentials=True,
+        expose_headers=["X-Request-ID"],
+        allow_headers=["Content-Type", "Authorization", "X-VM-ID", "X-API-Key"],
+        allow_methods=["GET", "POST", "OPTIONS"]
+    )
+}
+
+
+# Pre-serialized bodies for errors that carry no request-specific data
+_ERR_PARSE = b'{"jsonrpc":"2.0","id":null,"error":{"code":-32700,"message":"Parse error"}}'
+_ERR_INVALID_REQUEST = b'{"jsonrpc":"2.0","id":null,"error":{"code":-32600,"message":"Invalid Request"}}'
+_ERR_EMPTY_BATCH = b'{"jsonrpc":"2.0","id":null,"error":{"code":-32600,"message":"Invalid Request: empty batch"}}'
+_ERR_UNAUTHORIZED = b'{"error":"Unauthorized"}'
+
+
+def _is_package_path(path: str) -> bool:
+    """Whether path lives inside the installed package directory"""
+    try:
+        return os.path.commonpath([os.path.realpath(path), _PACKAGE_DIR]) == _PACKAGE_DIR
+    except ValueError:
+        # Paths on different drives
+        return False
+
+
+def _read_config_cache(cache_path: str, config_stat: os.stat_result) -> Optional[Dict[str, Any]]:
+    """Load a cached parsed config if it was built from the file described by config_stat"""
+    try:
+        with open(cache_path, 'rb') as f:
+            cached = orjson.loads(f.read())
+        if cached['mtime_ns'] == config_stat.st_mtime_ns and cached['size'] == config_stat.st_size:
+            return cached['config']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass
+    return None
+
+
+def _write_config_cache(cache_path: str, config_stat: os.stat_result, config: Dict[str, Any]) -> None:
+    """Atomically write a parsed config cache with the same permissions as its YAML source"""
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    try:
+        # Skip configs JSON cannot reproduce exactly, e.g. YAML dates or integer keys
+        serialized = orjson.dumps(config)
+        if orjson.loads(serialized) != config:
+            return
+        
+        fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, config_stat.st_mode & 0o777)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(b'{"mtime_ns":%d,"size":%d,"config":%s}' % (
+                config_stat.st_mtime_ns, config_stat.st_size, serialized
+            ))
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError) as e:
+        # Caching is an optimization; read-only config directories are fine
+        logger.debug(f"Could not write config cache {cache_path}: {e}")
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+
+
+def _json_response(data: Any, status: int = 200) -> web.Response:
+    """Build a JSON response serialized with orjson, stringifying unknown types"""
+    return web.Response(body=orjson.dumps(data, default=str), status=status, content_type='application/json')
+
+
+def _jsonrpc_error(code: int, message: str, request_id: Any, status: int) -> Tuple[bytes, int]:
+    """Build a serialized JSON-RPC error response and its HTTP status"""
+    return orjson.dumps({
+        'jsonrpc': '2.0',
+        'id': request_id,
+        'error': {'code': code, 'message': message}
+    }), status
+
+
+def _text_size(value: Any) -> int:
+    """Rough amount of text in a tool result, measured without encoding it"""
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(_text_size(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_text_size(item) for item in value)
+    return 0
+
+
+async def _acquire_within(semaphore: asyncio.Semaphore, timeout: float) -> bool:
+    """Acquire a semaphore permit within timeout, returning False if none freed up"""
+    if not semaphore.locked():
+        # Free permit: acquire() returns without suspending
+        await semaphore.acquire()
+        return True
+    
+    # asyncio.wait_for on 3.8-3.11 can drop a permit acquired just as the timeout
+    # fires; waiting on the acquire task directly lets us release it ourselves
+    acquire = asyncio.ensure_future(semaphore.acquire())
+    try:
+        await asyncio.wait((acquire,), timeout=timeout)
+    except BaseException:
+        if acquire.done() and not acquire.cancelled():
+            semaphore.release()
+        else:
+            acquire.cancel()
+        raise
+    
+    if acquire.done():
+        return True
+    # A cancelled acquire never takes the permit
+    acquire.cancel()
+    return False
+
 
 class VMAgentServer:
     """
@@ -95,15 +239,39 @@ class VMAgentServer:
         # Register MCP tools
         self._register_mcp_tools()
         
+        # Serialized tools/list response after its id, rebuilt only when the tool set changes
+        self._tools_list_body: Optional[bytes] = None
+        self._tools_list_key: Optional[tuple] = None
+        self._tool_names: frozenset = frozenset()
+        
+        # Concurrency limit for tool calls, created on the serving event loop in create_app()
+        self._tool_semaphore: Optional[asyncio.Semaphore] = None
+        self._tools_in_flight = 0
+        
+        # MCP method dispatch table
+        self._mcp_methods = {
+            'tools/list': self._handle_tools_list,
+            'tools/call': self._handle_tools_call,
+        }
+        
         # Initialize WebSocket handler if orchestrator URL is configured
         # Note: We'll initialize this after loading credentials
-        self.ws_handler: Optional[WebSocketCommandHandler] = None
+        self.ws_handler: Optional['tools.WebSocketCommandHandler'] = None
         
         # Server state
         self._app: Optional[web.Application] = None
         self._runner: Optional[web.AppRunner] = None
         self._site: Optional[web.TCPSite] = None
         self._running = False
+        self._shutdown_event: Optional[asyncio.Event] = None
+        
+        # Pre-serialized invariant fields of the /health and /info bodies
+        self._static_bodies: Dict[str, bytes] = {}
+        self._static_bodies_key: Optional[tuple] = None
+        
+        # ISO timestamp shared by /health responses produced within the same half second
+        self._timestamp_iso = datetime.now().isoformat()
+        self._timestamp_expires = time.monotonic() + TIMESTAMP_RESOLUTION
         
         logger.info(f"VM Agent Server {self.vm_id} initialized")
     
@@ -123,18 +291,33 @@ class VMAgentServer:
                 logger.warning(f"Config file not found: {config_path}, using defaults")
                 return self._get_default_config()
             
-            with open(config_path, 'r') as f:
+            # Reuse the parsed config from the JSON sidecar while the YAML is unchanged.
+            # Configs shipped in the package are not cached, so nothing is written
+            # into site-packages
+            config_stat = os.stat(config_path)
+            cache_path = None if _is_package_path(config_path) else config_path + CONFIG_CACHE_SUFFIX
+            if cache_path:
+                config = _read_config_cache(cache_path, config_stat)
+                if config is not None:
+                    return config
+            
+            # libyaml reads bytes directly, so only decode when substituting
+            with open(config_path, 'rb') as f:
                 config_content = f.read()
             
-            # Replace environment variables in config content
-            import re
-            config_content = re.sub(
-                r'\$\{([^}]+)\}',
-                lambda m: os.environ.get(m.group(1), m.group(0)),
-                config_content
-            )
+            # Replace environment variables in config content. Configs that reference
+            # the environment are never cached, so a changed variable is always
+            # picked up and its value is never written to disk
+            has_env_refs = b'${' in config_content
+            if has_env_refs:
+                config_content = _ENV_VAR_RE.sub(
+                    lambda m: os.environ.get(m.group(1), m.group(0)),
+                    config_content.decode('utf-8')
+                )
             
-            config = yaml.safe_load(config_content)
+            config = yaml.load(config_content, Loader=YAML_LOADER)
+            if cache_path and not has_env_refs and isinstance(config, dict):
+                _write_config_cache(cache_path, config_stat, config)
             return config
             
         except Exception as e:
@@ -196,22 +379,22 @@ class VMAgentServer:
         
         # Initialize Shell Executor
         if tools_config.get('shell_executor', {}).get('enabled', True):
-            self.tools['shell'] = ShellExecutor(tools_config.get('shell_executor', {}))
+            self.tools['shell'] = tools.ShellExecutor(tools_config.get('shell_executor', {}))
             logger.info("Shell Executor tool enabled")
         
         # Initialize File Manager
         if tools_config.get('file_manager', {}).get('enabled', True):
-            self.tools['file'] = FileManager(tools_config.get('file_manager', {}))
+            self.tools['file'] = tools.FileManager(tools_config.get('file_manager', {}))
             logger.info("File Manager tool enabled")
         
         # Initialize System Monitor
         if tools_config.get('system_monitor', {}).get('enabled', True):
-            self.tools['system'] = SystemMonitor(tools_config.get('system_monitor', {}))
+            self.tools['system'] = tools.SystemMonitor(tools_config.get('system_monitor', {}))
             logger.info("System Monitor tool enabled")
         
         # Initialize Log Analyzer
         if tools_config.get('log_analyzer', {}).get('enabled', True):
-            self.tools['logs'] = LogAnalyzer(tools_config.get('log_analyzer', {}))
+            self.tools['logs'] = tools.LogAnalyzer(tools_config.get('log_analyzer', {}))
             logger.info("Log Analyzer tool enabled")
     
     def _register_mcp_tools(self) -> None:
@@ -273,34 +456,44 @@ class VMAgentServer:
                 result = await self.tools['logs'].analyze_log_file(log_path, lines)
                 return self._add_vm_context(result)
     
+    def _timestamp(self) -> str:
+        """Get the current ISO timestamp, reusing it for TIMESTAMP_RESOLUTION seconds"""
+        now = time.monotonic()
+        if now >= self._timestamp_expires:
+            self._timestamp_iso = datetime.now().isoformat()
+            self._timestamp_expires = now + TIMESTAMP_RESOLUTION
+        return self._timestamp_iso
+    
     def _add_vm_context(self, result: Dict[str, Any]) -> Dict[str, Any]:
         """Add VM context information to results"""
         if isinstance(result, dict):
             result.setdefault("vm_id", self.vm_id)
             result.setdefault("vm_name", self.config['agent']['name'])
+            # Exact time: orchestrators order command results by it
             result.setdefault("timestamp", datetime.now().isoformat())
         return result
     
     async def create_app(self) -> web.Application:
         """Create and configure the web application"""
-        app = web.Application()
+        server_config = self.config.get('server', {})
+        app = web.Application(client_max_size=server_config.get('max_body', 1_048_576))
+        
+        self._tool_semaphore = asyncio.Semaphore(
+            server_config.get('max_concurrent_tools', 32)
+        )
+        
+        # Build the tools/list response now rather than on the first request
+        await self._get_tools_list_body()
         
         # Configure CORS
-        cors = aiohttp_cors.setup(app, defaults={
-            "*": aiohttp_cors.ResourceOptions(
-                allow_credentials=True,
-                expose_headers=["X-Request-ID"],
-                allow_headers=["Content-Type", "Authorization", "X-VM-ID", "X-API-Key"],
-                allow_methods=["GET", "POST", "OPTIONS"]
-            )
-        })
+        cors = aiohttp_cors.setup(app, defaults=CORS_DEFAULTS)
         
         # Add security middleware
         @web.middleware
         async def auth_middleware(request, handler):
             """Verify API key for protected endpoints"""
-            # Skip auth for public endpoints
-            if request.path in ['/health', '/api/v1/ca-certificate']:
+            # Skip auth for public endpoints and CORS preflights, which never carry credentials
+            if request.method == 'OPTIONS' or request.path in PUBLIC_PATHS:
                 return await handler(request)
             
             # Verify API key
@@ -310,7 +503,7 @@ class VMAgentServer:
             )
             
             if not self.security_manager.verify_api_key(api_key):
-                return web.json_response({'error': 'Unauthorized'}, status=401)
+                return web.Response(body=_ERR_UNAUTHORIZED, status=401, content_type='application/json')
             
             return await handler(request)
         
@@ -328,8 +521,44 @@ class VMAgentServer:
         
         return app
     
+    def _static_body(self, endpoint: str) -> bytes:
+        """Get the serialized invariant part of an endpoint body, without its closing brace"""
+        key = (self.vm_id, tuple(self.tools), tuple(self.config['agent'].items()))
+        if self._static_bodies_key != key:
+            self._static_bodies = {
+                'health': orjson.dumps({
+                    "status": "healthy",
+                    "vm_id": self.vm_id,
+                    "version": self.config['agent']['version'],
+                    "tools_enabled": list(self.tools.keys()),
+                })[:-1],
+                'info': orjson.dumps({
+                    "agent": self.config['agent'],
+                    "vm_id": self.vm_id,
+                    "tools": {name: tool.__class__.__name__ for name, tool in self.tools.items()},
+                    "capabilities": [
+                        "shell_execution",
+                        "file_management",
+                        "system_monitoring",
+                        "log_analysis",
+                        "websocket_communication",
+                        "mcp_protocol"
+                    ]
+                })[:-1],
+            }
+            self._static_bodies_key = key
+        return self._static_bodies[endpoint]
+    
+    def _endpoint_response(self, endpoint: str, dynamic: Dict[str, Any]) -> web.Response:
+        """Build an endpoint response from its cached invariant part plus per-request fields"""
+        body = self._static_body(endpoint) + b',' + orjson.dumps(dynamic)[1:]
+        return web.Response(body=body, content_type='application/json')
+    
     async def _handle_health(self, request: web.Request) -> web.Response:
-        """Health check endpoint"""
+        """Health check endpoint; pass ?precise=1 for an exact timestamp"""
+        timestamp = (
+            datetime.now().isoformat() if request.query.get('precise') else self._timestamp()
+        )
         try:
             tenant_status = "unknown"
             if await self.tenant_manager.load_tenant_config():
@@ -342,42 +571,26 @@ class VMAgentServer:
             elif self._credentials_loaded:
                 security_status = "credentials_loaded"
             
-            health_data = {
-                "status": "healthy",
-                "vm_id": self.vm_id,
-                "version": self.config['agent']['version'],
+            return self._endpoint_response('health', {
                 "tenant_status": tenant_status,
                 "security_status": security_status,
-                "tools_enabled": list(self.tools.keys()),
                 "websocket_connected": self.ws_handler is not None and self.ws_handler._running if self.ws_handler else False,
-                "timestamp": datetime.now().isoformat()
-            }
-            return web.json_response(health_data)
+                "tools_in_flight": self._tools_in_flight,
+                "timestamp": timestamp
+            })
         except Exception as e:
             logger.error(f"Health check failed: {e}")
-            return web.json_response({
+            return _json_response({
                 "status": "error",
                 "error": str(e),
-                "timestamp": datetime.now().isoformat()
+                "timestamp": timestamp
             }, status=500)
     
     async def _handle_info(self, request: web.Request) -> web.Response:
         """Agent information endpoint"""
-        info = {
-            "agent": self.config['agent'],
-            "vm_id": self.vm_id,
-            "tools": {name: tool.__class__.__name__ for name, tool in self.tools.items()},
-            "tenant": await self.tenant_manager.load_tenant_config(),
-            "capabilities": [
-                "shell_execution",
-                "file_management", 
-                "system_monitoring",
-                "log_analysis",
-                "websocket_communication",
-                "mcp_protocol"
-            ]
-        }
-        return web.json_response(info)
+        return self._endpoint_response('info', {
+            "tenant": await self.tenant_manager.load_tenant_config()
+        })
     
     async def _handle_ca_certificate(self, request: web.Request) -> web.Response:
         """Get CA certificate for client verification"""
@@ -386,23 +599,157 @@ class VMAgentServer:
             return web.Response(text=ca_cert, content_type='application/x-pem-file')
         except FileNotFoundError:
             logger.warning("CA certificate not available yet")
-            return web.json_response({
+            return _json_response({
                 'error': 'CA certificate not available', 
                 'message': 'Agent may not be fully registered yet'
             }, status=404)
         except Exception as e:
             logger.error(f"Failed to get CA certificate: {e}")
-            return web.json_response({'error': 'Internal server error'}, status=500)
+            return _json_response({'error': 'Internal server error'}, status=500)
     
     async def _handle_mcp_request(self, request: web.Request) -> web.Response:
-        """Handle MCP protocol requests"""
+        """Handle MCP JSON-RPC requests, including JSON-RPC batches"""
         try:
-            data = await request.json()
-            result = await self.mcp.handle_request(data)
-            return web.json_response(result)
+            data = orjson.loads(await request.read())
+        except orjson.JSONDecodeError:
+            return web.Response(body=_ERR_PARSE, status=400, content_type='application/json')
+        
+        try:
+            if isinstance(data, list):
+                if not data:
+                    return web.Response(body=_ERR_EMPTY_BATCH, status=400, content_type='application/json')
+                
+                responses = await asyncio.gather(*[self._dispatch_mcp(item) for item in data])
+                bodies = [
+                    body for item, (body, _) in zip(data, responses)
+                    if not isinstance(item, dict) or 'id' in item
+                ]
+                if not bodies:
+                    return web.Response(status=204)
+                return web.Response(body=b'[' + b','.join(bodies) + b']', content_type='application/json')
+            
+            body, status = await self._dispatch_mcp(data)
+            return web.Response(body=body, status=status, content_type='application/json')
         except Exception as e:
             logger.error(f"MCP request error: {e}")
-            return web.json_response({'error': str(e)}, status=500)
+            body, status = _jsonrpc_error(-32603, str(e), None, 500)
+            return web.Response(body=body, status=status, content_type='application/json')
+    
+    async def _dispatch_mcp(self, data: Any) -> Tuple[bytes, int]:
+        """Dispatch a single JSON-RPC request and return its serialized response and status"""
+        if not isinstance(data, dict):
+            return _ERR_INVALID_REQUEST, 400
+        
+        request_id = data.get('id')
+        method = data.get('method')
+        
+        handler = self._mcp_methods.get(method)
+        if handler is None:
+            return _jsonrpc_error(-32601, f'Method not found: {method}', request_id, 404)
+        
+        try:
+            return await handler(data.get('params') or {}, request_id)
+        except Exception as e:
+            logger.error(f"MCP method {method} failed: {e}")
+            return _jsonrpc_error(-32603, str(e), request_id, 500)
+    
+    async def _handle_tools_list(self, params: Dict[str, Any], request_id: Any) -> Tuple[bytes, int]:
+        """Handle the tools/list MCP method"""
+        tail = await self._get_tools_list_body()
+        return b'{"jsonrpc":"2.0","id":' + orjson.dumps(request_id) + tail, 200
+    
+    async def _handle_tools_call(self, params: Dict[str, Any], request_id: Any) -> Tuple[bytes, int]:
+        """Handle the tools/call MCP method"""
+        tool_name = params.get('name')
+        if not tool_name:
+            return _jsonrpc_error(-32602, 'Invalid params: missing tool name', request_id, 400)
+        
+        # Reject unknown tools before they take a concurrency slot
+        await self._get_tools_list_body()
+        if tool_name not in self._tool_names:
+            return _jsonrpc_error(-32602, f'Unknown tool: {tool_name}', request_id, 404)
+        
+        # Apply backpressure instead of letting tool calls pile up without bound
+        if not await _acquire_within(
+            self._tool_semaphore, self.config.get('server', {}).get('tool_queue_timeout', 5)
+        ):
+            return _jsonrpc_error(-32000, 'Server busy: too many concurrent tool calls', request_id, 503)
+        
+        self._tools_in_flight += 1
+        try:
+            tool, result = await self._call_mcp_tool(tool_name, params.get('arguments') or {})
+        except ToolError as e:
+            # FastMCP validates arguments against the tool schema before running it
+            if isinstance(e.__cause__, ValidationError):
+                details = '; '.join(
+                    f"{'.'.join(map(str, error['loc']))}: {error['msg']}" for error in e.__cause__.errors()
+                )
+                return _jsonrpc_error(-32602, f'Invalid params: {details}', request_id, 400)
+            raise
+        finally:
+            self._tools_in_flight -= 1
+            self._tool_semaphore.release()
+        
+        # Encode large results (e.g. read_file on a big file) off the event loop;
+        # the size is taken from the raw result so no encoding happens before that
+        if _text_size(result) > LARGE_RESULT_SIZE:
+            return await asyncio.to_thread(self._encode_tools_call, request_id, tool, result), 200
+        return self._encode_tools_call(request_id, tool, result), 200
+    
+    async def _get_tools_list_body(self) -> bytes:
+        """Get the serialized tools/list response after its id, building it on first use"""
+        key = tuple(self.tools)
+        if self._tools_list_body is None or self._tools_list_key != key:
+            tools = await self.mcp.list_tools()
+            self._tool_names = frozenset(tool.name for tool in tools)
+            self._tools_list_body = b',"result":' + orjson.dumps({
+                'tools': [tool.model_dump(mode='json', by_alias=True, exclude_none=True) for tool in tools]
+            }) + b'}'
+            self._tools_list_key = key
+        return self._tools_list_body
+    
+    async def _call_mcp_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Tuple[Any, Any]:
+        """Call a registered MCP tool, returning the tool and its unconverted result"""
+        # Same steps as FastMCP.call_tool, but with result conversion left to
+        # _encode_tools_call. These are FastMCP internals, so mcp is pinned to the
+        # tested range and test_fastmcp_internals_match_call_tool guards upgrades
+        tool = self.mcp._tool_manager.get_tool(tool_name)
+        if tool is None:
+            raise ToolError(f"Unknown tool: {tool_name}")
+        return tool, await tool.run(arguments, context=self.mcp.get_context(), convert_result=False)
+    
+    def _encode_tools_call(self, request_id: Any, tool: Any, result: Any) -> bytes:
+        """Serialize a complete tools/call response for a raw tool result"""
+        response = {'jsonrpc': '2.0', 'id': request_id, 'result': self._tools_call_result(tool, result)}
+        return orjson.dumps(response, default=str)
+    
+    @staticmethod
+    def _tools_call_result(tool: Any, result: Any) -> Dict[str, Any]:
+        """Build the tools/call result object for a raw tool result"""
+        if isinstance(result, dict):
+            # Agent tools return plain dicts; encode the text copy compactly with
+            # orjson rather than FastMCP's indented pydantic dump
+            return {
+                'content': [{'type': 'text', 'text': orjson.dumps(result, default=str).decode()}],
+                'structuredContent': result,
+                'isError': False
+            }
+        
+        result = tool.fn_metadata.convert_result(result)
+        structured = None
+        if isinstance(result, tuple):
+            result, structured = result
+        
+        if isinstance(result, dict):
+            return {'content': [], 'structuredContent': result, 'isError': False}
+        
+        response = {
+            'content': [block.model_dump(mode='json', by_alias=True, exclude_none=True) for block in result],
+            'isError': False
+        }
+        if structured is not None:
+            response['structuredContent'] = structured
+        return response
     
     def _create_ssl_context(self) -> Optional[ssl.SSLContext]:
         """Create SSL context for HTTPS server"""
@@ -444,7 +791,7 @@ class VMAgentServer:
                 return False
             
             if not self.ws_handler:
-                self.ws_handler = WebSocketCommandHandler(
+                self.ws_handler = tools.WebSocketCommandHandler(
                     self, self.security_manager, orchestrator_url
                 )
             
@@ -510,8 +857,18 @@ class VMAgentServer:
             # Create application
             self._app = await self.create_app()
             
-            # Create runner
-            self._runner = web.AppRunner(self._app)
+            if HttpRequestParserC is None:
+                logger.warning("aiohttp C HTTP parser unavailable, install aiohttp[speedups] for better performance")
+            
+            # Create runner; signals are handled by run_forever. The access log is
+            # the only per-request log, so it stays on unless disabled in config
+            server_config = self.config.get('server', {})
+            self._runner = web.AppRunner(
+                self._app,
+                access_log=web.access_logger if server_config.get('access_log', True) else None,
+                handle_signals=False,
+                keepalive_timeout=server_config.get('keepalive_timeout', 75),
+            )
             await self._runner.setup()
             
             # Configure SSL if enabled and certificates are available
@@ -523,11 +880,15 @@ class VMAgentServer:
             host = self.config.get('server', {}).get('host', '0.0.0.0')
             port = self.config.get('server', {}).get('port', 8080)
             
+            # reuse_port is opt-in: it lets several agent processes share the port,
+            # but it would also let a second agent start silently on top of this one
             self._site = web.TCPSite(
                 self._runner, 
                 host, 
                 port, 
-                ssl_context=ssl_context
+                ssl_context=ssl_context,
+                backlog=server_config.get('backlog', 2048),
+                reuse_port=server_config.get('reuse_port', False) or None
             )
             
             await self._site.start()
@@ -539,6 +900,8 @@ class VMAgentServer:
             
             protocol = "HTTPS" if ssl_context else "HTTP"
             logger.info(f"VM Agent Server started on {host}:{port} ({protocol})")
+            loop_type = type(asyncio.get_running_loop())
+            logger.info(f"Event loop: {loop_type.__module__}.{loop_type.__qualname__}")
             
         except Exception as e:
             logger.error(f"Failed to start server: {e}", exc_info=True)
@@ -563,6 +926,8 @@ class VMAgentServer:
                 await self._runner.cleanup()
             
             self._running = False
+            if self._shutdown_event:
+                self._shutdown_event.set()
             logger.info("VM Agent Server stopped")
             
         except Exception as e:
@@ -570,25 +935,25 @@ class VMAgentServer:
     
     async def run_forever(self) -> None:
         """Run the server forever until interrupted"""
+        self._shutdown_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        
+        # Set up signal handlers for graceful shutdown
+        def signal_handler(signum: int) -> None:
+            logger.info(f"Received signal {signum}, shutting down...")
+            self._shutdown_event.set()
+        
+        for signum in (signal.SIGINT, signal.SIGTERM):
+            loop.add_signal_handler(signum, signal_handler, signum)
+        
         try:
             await self.start()
             
-            # Set up signal handlers for graceful shutdown
-            def signal_handler(signum, frame):
-                logger.info(f"Received signal {signum}, shutting down...")
-                loop = asyncio.get_event_loop()
-                loop.create_task(self.stop())
-            
-            signal.signal(signal.SIGINT, signal_handler)
-            signal.signal(signal.SIGTERM, signal_handler)
-            
-            # Keep running until stopped
-            while self._running:
-                await asyncio.sleep(1)
-                
-        except KeyboardInterrupt:
-            logger.info("Received keyboard interrupt")
+            # Sleep until a signal or stop() requests shutdown
+            await self._shutdown_event.wait()
         finally:
+            for signum in (signal.SIGINT, signal.SIGTERM):
+                loop.remove_signal_handler(signum)
             await self.stop()
 
     def is_ready(self) -> bool:
@@ -612,15 +977,12 @@ async def main() -> None:
     parser.add_argument('--provisioning-token', help='Provisioning token for initial setup')
     args = parser.parse_args()
     
-    # Configure logging
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.FileHandler('/var/log/vm-agent.log'),
-            logging.StreamHandler()
-        ]
-    )
+    # Configure logging; records are written by a listener thread so disk
+    # latency never stalls the event loop
+    log_listener = _start_log_listener([
+        logging.FileHandler('/var/log/vm-agent.log'),
+        logging.StreamHandler()
+    ])
     
     # Prepare configuration overrides
     config_overrides = {}
@@ -655,7 +1017,39 @@ async def main() -> None:
     except Exception as e:
         logger.error(f"Server startup failed: {e}", exc_info=True)
         sys.exit(1)
+    finally:
+        log_listener.stop()
+
+
+def _start_log_listener(handlers: List[logging.Handler]) -> logging.handlers.QueueListener:
+    """Route root logging through a queue drained by the given handlers on a background thread"""
+    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    
+    # The queue side only merges the message; the handlers above add the layout
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter('%(message)s'))
+    logging.basicConfig(level=logging.INFO, handlers=[queue_handler])
+    return listener
+
+
+def run_async(coro: Any) -> Any:
+    """Run a coroutine to completion, on uvloop when it is installed"""
+    if uvloop is None:
+        return asyncio.run(coro)
+    
+    if sys.version_info >= (3, 11):
+        with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+            return runner.run(coro)
+    
+    uvloop.install()
+    return asyncio.run(coro)
 
 
 if __name__ == "__main__":
-    asyncio.run(main()) 
\ No newline at end of file
+    run_async(main()) 
\ No newline at end of file
@@ -1,10 +1,13 @@
 import os
+import re
+import asyncio
 import aiofiles
 import json
 import mimetypes
 from typing import Dict, Any, List, Optional
 from pathlib import Path
 import fnmatch
+from stat import S_ISDIR
 import logging
 from datetime import datetime
 
@@ -16,28 +19,41 @@ class FileManager:
         self.max_file_size = config.get('max_file_size', 100 * 1024 * 1024)  # 100MB default
         self.allowed_paths = config.get('allowed_paths', [])
         self.blocked_paths = config.get('blocked_paths', [])
+        
+        # Translate the glob patterns once instead of on every path check
+        self._blocked_re = self._compile_globs(self.blocked_paths)
+        self._allowed_re = self._compile_globs(self.allowed_paths)
+        self._allow_all = not self.allowed_paths or "*" in self.allowed_paths
+    
+    @staticmethod
+    def _compile_globs(patterns: List[str]) -> Optional[re.Pattern]:
+        """Compile glob patterns into one regex matching like fnmatch.fnmatch on any of them"""
+        if not patterns:
+            return None
+        return re.compile('|'.join(fnmatch.translate(os.path.normcase(p)) for p in patterns))
     
     def is_path_allowed(self, path: str) -> bool:
         """Check if file path is allowed"""
-        abs_path = os.path.abspath(path)
+        abs_path = os.path.normcase(os.path.abspath(path))
         
         # Check blocked paths first
-        for blocked_pattern in self.blocked_paths:
-            if fnmatch.fnmatch(abs_path, blocked_pattern):
-                return False
+        if self._blocked_re is not None and self._blocked_re.match(abs_path):
+            return False
         
         # Check allowed paths
-        if not self.allowed_paths or "*" in self.allowed_paths:
+        if self._allow_all:
             return True
-            
-        for allowed_pattern in self.allowed_paths:
-            if fnmatch.fnmatch(abs_path, allowed_pattern):
-                return True
-                
-        return False
+        
+        return self._allowed_re.match(abs_path) is not None
     
     async def read_file(self, file_path: str, encoding: str = 'utf-8') -> Dict[str, Any]:
         """Read file contents"""
+        # The checks and the read run as one worker-thread job rather than a
+        # thread-pool hop per aiofiles operation
+        return await asyncio.to_thread(self._read_file_sync, file_path, encoding)
+    
+    def _read_file_sync(self, file_path: str, encoding: str) -> Dict[str, Any]:
+        """Blocking implementation of read_file"""
         try:
             # Security check
             if not os.path.exists(file_path):
@@ -56,8 +72,8 @@ class FileManager:
                     "timestamp": datetime.now().isoformat()
                 }
             
-            async with aiofiles.open(file_path, 'r', encoding=encoding) as f:
-                content = await f.read()
+            with open(file_path, 'r', encoding=encoding) as f:
+                content = f.read()
             
             return {
                 "success": True,
@@ -123,18 +139,19 @@ class FileManager:
                 }
             
             files = []
-            for item in os.listdir(directory_path):
-                item_path = os.path.join(directory_path, item)
-                item_stat = os.stat(item_path)
-                
-                files.append({
-                    "name": item,
-                    "path": item_path,
-                    "type": "directory" if os.path.isdir(item_path) else "file",
-                    "size": item_stat.st_size,
-                    "modified": datetime.fromtimestamp(item_stat.st_mtime).isoformat(),
-                    "permissions": oct(item_stat.st_mode)[-3:]
-                })
+            # One stat per entry gives type, size, mtime and permissions
+            with os.scandir(directory_path) as entries:
+                for entry in entries:
+                    item_stat = entry.stat()
+                    
+                    files.append({
+                        "name": entry.name,
+                        "path": entry.path,
+                        "type": "directory" if S_ISDIR(item_stat.st_mode) else "file",
+                        "size": item_stat.st_size,
+                        "modified": datetime.fromtimestamp(item_stat.st_mtime).isoformat(),
+                        "permissions": format(item_stat.st_mode & 0o777, '03o')
+                    })
             
             return {
                 "success": True,
@@ -1,16 +1,125 @@
 import re
 import os
+import stat
+import asyncio
+from collections import Counter, deque
+from itertools import islice
 from typing import Dict, Any, List, Optional, Pattern
 from datetime import datetime, timedelta
 import json
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+
+# Line formats recognised by analyze_log, plus helpers for timestamps and IPs
+LOG_PATTERNS: Dict[str, Pattern] = {
+    'apache_common': re.compile(
+        r'^(?P<ip>\S+) \S+ (?P<user>\S+) \[(?P<timestamp>[^\]\s]+)[^\]]*\] '
+        r'"(?P<method>\S+) (?P<path>\S+)[^"]*" (?P<status>\d{3}) (?P<size>\S+)\s*$'
+    ),
+    'apache_combined': re.compile(
+        r'^(?P<ip>\S+) \S+ (?P<user>\S+) \[(?P<timestamp>[^\]\s]+)[^\]]*\] '
+        r'"(?P<method>\S+) (?P<path>\S+)[^"]*" (?P<status>\d{3}) (?P<size>\S+) '
+        r'"(?P<referrer>[^"]*)" "(?P<user_agent>[^"]*)"'
+    ),
+    'nginx': re.compile(
+        r'^(?P<timestamp>\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}) \[(?P<severity>\w+)\] '
+        r'(?P<pid>\d+)#(?P<tid>\d+): (?P<message>.*)$'
+    ),
+    'syslog': re.compile(
+        r'^(?P<timestamp>\w{3}\s+\d{1,2} \d{2}:\d{2}:\d{2}) (?P<host>\S+) '
+        r'(?P<process>[^:\[\s]+)(?:\[(?P<pid>\d+)\])?: (?P<message>.*)$'
+    ),
+    'ip_address': re.compile(r'\b(?:\d{1,3}\.){3}\d{1,3}\b'),
+    'timestamp_iso': re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d+)?'),
+    'timestamp_common': re.compile(
+        r'\d{2}/\w{3}/\d{4}:\d{2}:\d{2}:\d{2}|\w{3}\s+\d{1,2} \d{2}:\d{2}:\d{2}'
+        r'|\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}'
+    ),
+}
+
+# Formats that auto-detection can report, most common first. The patterns are
+# anchored and mutually exclusive, so the order only decides which is tried first
+LOG_FORMATS = ('nginx', 'apache_combined', 'apache_common', 'syslog')
+
+# All detectable formats as one alternation, tried in order at the start of the
+# line (every format is anchored), so format detection scans each line once; inner group names are dropped as they repeat across formats
+_FORMAT_UNION = re.compile('|'.join(
+    f"(?P<{name}>{re.sub(r'[(][?]P<[^>]+>', '(?:', LOG_PATTERNS[name].pattern)})"
+    for name in LOG_FORMATS
+))
+
+# Level keywords, matched as substrings like the original word lists ("error"
+# contains "err", "warning" contains "warn"), ranked from most to least severe
+_LEVEL_RE = re.compile(r'err|crit|fatal|warn|info|debug|dbg', re.IGNORECASE)
+_LEVEL_RANKS = {'err': 0, 'crit': 0, 'fatal': 0, 'warn': 1, 'info': 2, 'debug': 3, 'dbg': 3}
+_LEVEL_NAMES = ('ERROR', 'WARNING', 'INFO', 'DEBUG', 'UNKNOWN')
+
+# Timestamp formats understood by _parse_timestamp, tried in order
+TIMESTAMP_FORMATS = (
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S',
+    '%d/%b/%Y:%H:%M:%S',
+    '%b %d %H:%M:%S',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%dT%H:%M:%S.%f',
+    '%Y/%m/%d %H:%M:%S',
+)
+
+# Shapes that identify a single format, so the common cases skip the failing
+# strptime attempts; ISO shapes go through the C fromisoformat parser
+_TIMESTAMP_DISPATCH = (
+    (re.compile(r'\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:\.\d{6})?'), datetime.fromisoformat),
+    (re.compile(r'\d{2}/[A-Za-z]{3}/\d{4}:\d{2}:\d{2}:\d{2}'),
+     lambda value: datetime.strptime(value, '%d/%b/%Y:%H:%M:%S')),
+    (re.compile(r'[A-Za-z]{3} +\d{1,2} \d{2}:\d{2}:\d{2}'),
+     lambda value: datetime.strptime(value, '%b %d %H:%M:%S')),
+    (re.compile(r'\d{4}/\d{2}/\d{2} \d{2}:\d{2}:\d{2}'),
+     lambda value: datetime.strptime(value, '%Y/%m/%d %H:%M:%S')),
+)
+
+# Bytes read per step when scanning a log backwards from its end
+TAIL_BLOCK_SIZE = 64 * 1024
+
+# Relative time ranges for analyze_log, e.g. '30m', '24h', '7d'
+_TIME_RANGE_RE = re.compile(r'(\d+)([smhdw])')
+
+
+@lru_cache(maxsize=4096)
+def _parse_timestamp(timestamp_str: str) -> Optional[datetime]:
+    """Parse a timestamp in any of TIMESTAMP_FORMATS, or return None"""
+    value = timestamp_str.strip()
+    
+    for shape, parse in _TIMESTAMP_DISPATCH:
+        if shape.fullmatch(value):
+            try:
+                return parse(value)
+            except ValueError:
+                break
+    
+    # Less regular input (unpadded fields and the like) still gets every format
+    for fmt in TIMESTAMP_FORMATS:
+        try:
+            return datetime.strptime(value, fmt)
+        except ValueError:
+            continue
+    
+    return None
+
+
+@lru_cache(maxsize=512)
+def _compile(pattern: str, flags: int = 0) -> Pattern:
+    """Compile a user-supplied pattern, reusing it across analyses"""
+    return re.compile(pattern, flags)
+
+
 class LogAnalyzer:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.max_lines = config.get('max_lines', 10000)
+        self.patterns = LOG_PATTERNS
         
         # Common log patterns
         self.error_patterns = [
@@ -31,6 +140,11 @@ class LogAnalyzer:
     
     async def analyze_log_file(self, log_path: str, lines: int = 100) -> Dict[str, Any]:
         """Analyze log file for patterns and errors"""
+        # Reading and scanning is blocking work, so it runs as one worker-thread job
+        return await asyncio.to_thread(self._analyze_log_file_sync, log_path, lines)
+    
+    def _analyze_log_file_sync(self, log_path: str, lines: int) -> Dict[str, Any]:
+        """Blocking implementation of analyze_log_file"""
         try:
             if not os.path.exists(log_path):
                 return {
@@ -124,40 +238,50 @@ class LogAnalyzer:
         include_stats = kwargs.get('include_stats', True)
         
         try:
-            # Read log lines
-            lines = await self._read_log_lines(log_path, lines_to_read, time_range)
-            
-            # Parse lines based on format
-            parsed_entries = self._parse_log_lines(lines, log_format)
-            
-            # Apply pattern filtering
-            if pattern:
-                filtered_entries = self._filter_by_pattern(parsed_entries, pattern)
-            else:
-                filtered_entries = parsed_entries
-            
-            # Generate statistics
-            stats = self._generate_stats(filtered_entries) if include_stats else None
-            
-            result = {
-                "log_path": log_path,
-                "total_lines_read": len(lines),
-                "matching_entries": len(filtered_entries),
-                "entries": filtered_entries,
-                "statistics": stats,
-                "analysis_time": datetime.now().isoformat(),
-                "pattern": pattern,
-                "time_range": time_range,
-                "format": log_format
-            }
-            
-            return result
+            # Reading, parsing and stats are blocking work, so they run as one
+            # worker-thread job and leave the event loop free for other tool calls
+            return await asyncio.to_thread(
+                self._analyze_log_sync, log_path, lines_to_read, time_range,
+                log_format, pattern, include_stats
+            )
             
         except Exception as e:
             logger.error(f"Failed to analyze log {log_path}: {e}")
             raise
     
-    async def _read_log_lines(self, log_path: str, max_lines: int, time_range: Optional[str]) -> List[str]:
+    def _analyze_log_sync(self, log_path: str, lines_to_read: int, time_range: Optional[str],
+                          log_format: str, pattern: Optional[str], include_stats: bool) -> Dict[str, Any]:
+        """Blocking implementation of analyze_log"""
+        # Read log lines
+        lines = self._read_log_lines(log_path, lines_to_read, time_range)
+        
+        # Parse lines based on format
+        parsed_entries = self._parse_log_lines(lines, log_format)
+        
+        # Apply pattern filtering
+        if pattern:
+            filtered_entries = self._filter_by_pattern(parsed_entries, pattern)
+        else:
+            filtered_entries = parsed_entries
+        
+        # Generate statistics
+        stats = self._generate_stats(filtered_entries) if include_stats else None
+        
+        result = {
+            "log_path": log_path,
+            "total_lines_read": len(lines),
+            "matching_entries": len(filtered_entries),
+            "entries": filtered_entries,
+            "statistics": stats,
+            "analysis_time": datetime.now().isoformat(),
+            "pattern": pattern,
+            "time_range": time_range,
+            "format": log_format
+        }
+        
+        return result
+    
+    def _read_log_lines(self, log_path: str, max_lines: int, time_range: Optional[str]) -> List[str]:
         """Read log lines with optional time filtering"""
         lines = []
         
@@ -173,15 +297,11 @@ class LogAnalyzer:
                     # Efficient tail reading
                     lines = self._tail_file(f, max_lines)
                 else:
-                    # Read all lines and filter
-                    for line_num, line in enumerate(f):
-                        if time_threshold and not self._is_line_in_time_range(line, time_threshold):
-                            continue
-                        
-                        lines.append(line.strip())
-                        
-                        if max_lines and len(lines) >= max_lines:
-                            break
+                    # Read all lines and filter, stopping after max_lines kept lines
+                    source = f
+                    if time_threshold:
+                        source = (line for line in f if self._is_line_in_time_range(line, time_threshold))
+                    lines = [line.strip() for line in islice(source, max_lines or None)]
             
             return lines
             
@@ -192,53 +312,87 @@ class LogAnalyzer:
     
     def _tail_file(self, file_obj, num_lines: int) -> List[str]:
         """Efficiently read last N lines from file"""
-        file_obj.seek(0, 2)  # Go to end of file
-        file_size = file_obj.tell()
-        
-        if file_size == 0:
+        if num_lines <= 0:
             return []
         
-        # Read in chunks from the end
-        lines = []
-        chunk_size = 8192
-        pos = file_size
+        encoding = getattr(file_obj, 'encoding', None) or 'utf-8'
+        errors = getattr(file_obj, 'errors', None) or 'strict'
         
-        while len(lines) < num_lines and pos > 0:
-            chunk_start = max(0, pos - chunk_size)
-            file_obj.seek(chunk_start)
-            chunk = file_obj.read(pos - chunk_start)
-            
-            chunk_lines = chunk.split('\n')
-            if pos < file_size:  # Not the first chunk
-                chunk_lines = chunk_lines[1:]  # Remove partial line
+        try:
+            raw = file_obj.buffer
+            if not stat.S_ISREG(os.fstat(raw.fileno()).st_mode):
+                raise ValueError("not a regular file")
+            # Splitting on b'\n' is only valid where newline is that single byte
+            if '\n'.encode(encoding) != b'\n':
+                raise ValueError(f"{encoding} is not ASCII-compatible")
+            pos = raw.seek(0, os.SEEK_END)
+        except (AttributeError, OSError, ValueError):
+            # Pipes, in-memory streams and UTF-16 and the like: stream it, keeping only the tail
+            return list(deque(
+                (line.rstrip('\r\n') for line in file_obj if line.strip()),
+                maxlen=num_lines
+            ))
+        
+        # Read fixed-size blocks backwards from the end, decoding only the lines we
+        # keep. Plain reads just come back short if the file is truncated meanwhile
+        # (logrotate copytruncate), where touching a shrunken mmap would SIGBUS
+        lines = []
+        partial = b''
+        while pos > 0 and len(lines) < num_lines:
+            size = min(TAIL_BLOCK_SIZE, pos)
+            pos -= size
+            raw.seek(pos)
+            block = raw.read(size)
+            if len(block) < size:
+                # Truncated under us; what was collected so far is still valid
+                break
             
-            lines = chunk_lines + lines
-            pos = chunk_start
+            chunks = (block + partial).split(b'\n')
+            # The first chunk may continue in the previous block, unless at the start
+            partial = chunks.pop(0) if pos > 0 else b''
+            for chunk in reversed(chunks):
+                line = chunk.decode(encoding, errors)
+                if line.endswith('\r'):
+                    line = line[:-1]
+                if line.strip():
+                    lines.append(line)
+                    if len(lines) == num_lines:
+                        break
         
-        return [line for line in lines if line.strip()][-num_lines:]
+        lines.reverse()
+        return lines
     
     def _parse_log_lines(self, lines: List[str], log_format: str) -> List[Dict[str, Any]]:
         """Parse log lines based on format"""
         parsed_entries = []
         
-        for line_num, line in enumerate(lines):
+        # Resolve everything that does not depend on the line once, outside the loop
+        auto_detect = log_format == 'auto'
+        fixed_pattern = None if auto_detect else self.patterns.get(log_format)
+        find_ips = self.patterns['ip_address'].findall
+        detect_level = self._detect_log_level
+        detect_format = self._detect_log_format
+        
+        for line_num, line in enumerate(lines, 1):
             entry = {
-                "line_number": line_num + 1,
+                "line_number": line_num,
                 "raw_line": line,
                 "parsed": {},
                 "timestamp": None,
-                "level": self._detect_log_level(line)
+                "level": detect_level(line)
             }
             
             # Auto-detect format if needed
-            if log_format == 'auto':
-                detected_format = self._detect_log_format(line)
+            if auto_detect:
+                detected_format = detect_format(line)
+                pattern = self.patterns.get(detected_format)
             else:
                 detected_format = log_format
+                pattern = fixed_pattern
             
             # Parse based on format
-            if detected_format in self.patterns:
-                match = self.patterns[detected_format].search(line)
+            if pattern is not None:
+                match = pattern.search(line)
                 if match:
                     entry["parsed"] = match.groupdict()
                     entry["format"] = detected_format
@@ -248,7 +402,7 @@ class LogAnalyzer:
                         entry["timestamp"] = self._parse_timestamp(entry["parsed"]["timestamp"])
             
             # Extract additional information
-            entry["ip_addresses"] = self.patterns['ip_address'].findall(line)
+            entry["ip_addresses"] = find_ips(line)
             
             parsed_entries.append(entry)
         
@@ -256,32 +410,24 @@ class LogAnalyzer:
     
     def _detect_log_format(self, line: str) -> str:
         """Auto-detect log format"""
-        for format_name, pattern in self.patterns.items():
-            if format_name in ['apache_common', 'apache_combined', 'nginx', 'syslog']:
-                if pattern.search(line):
-                    return format_name
-        return 'unknown'
+        match = _FORMAT_UNION.match(line)
+        return match.lastgroup if match else 'unknown'
     
     def _detect_log_level(self, line: str) -> str:
         """Detect log level from line"""
-        line_lower = line.lower()
-        
-        if any(word in line_lower for word in ['error', 'err', 'critical', 'crit', 'fatal']):
-            return 'ERROR'
-        elif any(word in line_lower for word in ['warn', 'warning']):
-            return 'WARNING'
-        elif any(word in line_lower for word in ['info', 'information']):
-            return 'INFO'
-        elif any(word in line_lower for word in ['debug', 'dbg']):
-            return 'DEBUG'
-        else:
-            return 'UNKNOWN'
+        # One scan for all keywords; the most severe one found wins
+        rank = 4
+        for match in _LEVEL_RE.finditer(line):
+            rank = min(rank, _LEVEL_RANKS[match.group().lower()])
+            if rank == 0:
+                break
+        return _LEVEL_NAMES[rank]
     
     def _filter_by_pattern(self, entries: List[Dict[str, Any]], pattern: str) -> List[Dict[str, Any]]:
         """Filter log entries by pattern"""
         try:
             # Try as regex first
-            regex_pattern = re.compile(pattern, re.IGNORECASE)
+            regex_pattern = _compile(pattern, re.IGNORECASE)
             return [entry for entry in entries if regex_pattern.search(entry["raw_line"])]
         except re.error:
             # Fall back to simple string matching
@@ -289,10 +435,8 @@ class LogAnalyzer:
             return [entry for entry in entries if pattern_lower in entry["raw_line"].lower()]
     
     def _parse_time_range(self, time_range: str) -> datetime:
-        """Parse time range string (e.g., '1h', '24h', '7d')"""
-        import re
-        
-        match = re.match(r'(\d+)([hdw])', time_range.lower())
+        """Parse time range string (e.g., '30m', '24h', '7d')"""
+        match = _TIME_RANGE_RE.match(time_range.lower())
         if not match:
             raise ValueError(f"Invalid time range format: {time_range}")
         
@@ -301,7 +445,11 @@ class LogAnalyzer:
         
         now = datetime.now()
         
-        if unit == 'h':
+        if unit == 's':
+            return now - timedelta(seconds=value)
+        elif unit == 'm':
+            return now - timedelta(minutes=value)
+        elif unit == 'h':
             return now - timedelta(hours=value)
         elif unit == 'd':
             return now - timedelta(days=value)
@@ -328,23 +476,8 @@ class LogAnalyzer:
     
     def _parse_timestamp(self, timestamp_str: str) -> Optional[datetime]:
         """Parse various timestamp formats"""
-        # Common timestamp formats
-        formats = [
-            '%Y-%m-%d %H:%M:%S',
-            '%Y-%m-%dT%H:%M:%S',
-            '%d/%b/%Y:%H:%M:%S',
-            '%b %d %H:%M:%S',
-            '%Y-%m-%d %H:%M:%S.%f',
-            '%Y-%m-%dT%H:%M:%S.%f'
-        ]
-        
-        for fmt in formats:
-            try:
-                return datetime.strptime(timestamp_str.strip(), fmt)
-            except ValueError:
-                continue
-        
-        return None
+        # Lines in one log share timestamps heavily, so parses are cached module-wide
+        return _parse_timestamp(timestamp_str)
     
     def _generate_stats(self, entries: List[Dict[str, Any]]) -> Dict[str, Any]:
         """Generate statistics from parsed log entries"""
@@ -358,49 +491,40 @@ class LogAnalyzer:
             "summary": {}
         }
         
-        timestamps = []
-        
-        for entry in entries:
-            # Log level distribution
-            level = entry.get("level", "UNKNOWN")
-            stats["log_levels"][level] = stats["log_levels"].get(level, 0) + 1
-            
-            # Collect timestamps
-            if entry.get("timestamp"):
-                timestamps.append(entry["timestamp"])
-            
-            # IP address frequency
-            for ip in entry.get("ip_addresses", []):
-                stats["top_ips"][ip] = stats["top_ips"].get(ip, 0) + 1
-            
-            # HTTP status codes (if parsed)
-            if "status" in entry.get("parsed", {}):
-                status = entry["parsed"]["status"]
-                stats["status_codes"][status] = stats["status_codes"].get(status, 0) + 1
-            
-            # Error pattern detection
-            if level == "ERROR":
-                stats["error_patterns"].append({
-                    "line": entry["line_number"],
-                    "message": entry["raw_line"][:200]  # Truncate long lines
-                })
+        # Histograms are counted in C by Counter; insertion order is kept, so ties
+        # still resolve to the first value seen
+        level_counts = Counter(entry.get("level", "UNKNOWN") for entry in entries)
+        ip_counts = Counter(ip for entry in entries for ip in entry.get("ip_addresses", ()))
+        status_counts = Counter(
+            entry["parsed"]["status"] for entry in entries if "status" in entry.get("parsed", {})
+        )
+        timestamps = [entry["timestamp"] for entry in entries if entry.get("timestamp")]
+        
+        stats["log_levels"] = dict(level_counts)
+        stats["status_codes"] = dict(status_counts)
+        stats["top_ips"] = dict(ip_counts.most_common(10))
+        
+        # Error pattern detection, limited to the first 20
+        stats["error_patterns"] = [
+            {
+                "line": entry["line_number"],
+                "message": entry["raw_line"][:200]  # Truncate long lines
+            }
+            for entry in islice((e for e in entries if e.get("level", "UNKNOWN") == "ERROR"), 20)
+        ]
         
         # Time range analysis
         if timestamps:
-            timestamps.sort()
+            earliest, latest = min(timestamps), max(timestamps)
             stats["time_range"] = {
-                "earliest": timestamps[0].isoformat(),
-                "latest": timestamps[-1].isoformat(),
-                "span_hours": (timestamps[-1] - timestamps[0]).total_seconds() / 3600
+                "earliest": earliest.isoformat(),
+                "latest": latest.isoformat(),
+                "span_hours": (latest - earliest).total_seconds() / 3600
             }
         
-        # Sort and limit top items
-        stats["top_ips"] = dict(sorted(stats["top_ips"].items(), key=lambda x: x[1], reverse=True)[:10])
-        stats["error_patterns"] = stats["error_patterns"][:20]  # Limit error patterns
-        
         # Generate summary
         stats["summary"] = {
-            "most_common_level": max(stats["log_levels"].items(), key=lambda x: x[1])[0] if stats["log_levels"] else "UNKNOWN",
+            "most_common_level": level_counts.most_common(1)[0][0] if level_counts else "UNKNOWN",
             "error_rate": stats["log_levels"].get("ERROR", 0) / len(entries) * 100 if entries else 0,
             "unique_ips": len(stats["top_ips"]),
             "has_errors": stats["log_levels"].get("ERROR", 0) > 0
@@ -442,30 +566,42 @@ class LogAnalyzer:
         matches = []
         
         try:
-            with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
-                lines = f.readlines()
+            if case_sensitive:
+                is_match = lambda line: search_term in line
+            else:
+                is_match = _compile(re.escape(search_term), re.IGNORECASE).search
             
-            search_pattern = search_term if case_sensitive else search_term.lower()
+            # Stream the file: keep only the last few lines for "before" context and
+            # fill in "after" context for recent matches as later lines arrive
+            before = deque(maxlen=context_lines)
+            pending = []  # [context, after lines still needed]
             
-            for i, line in enumerate(lines):
-                search_line = line if case_sensitive else line.lower()
-                
-                if search_pattern in search_line:
-                    # Get context lines
-                    start_idx = max(0, i - context_lines)
-                    end_idx = min(len(lines), i + context_lines + 1)
-                    
-                    context = {
-                        "line_number": i + 1,
-                        "matching_line": line.strip(),
-                        "context_before": [lines[j].strip() for j in range(start_idx, i)],
-                        "context_after": [lines[j].strip() for j in range(i + 1, end_idx)]
-                    }
+            with open(log_path, 'r', encoding='utf-8', errors='replace') as f:
+                for i, line in enumerate(f):
+                    stripped = line.strip()
                     
-                    matches.append(context)
+                    if pending:
+                        for waiting in pending:
+                            waiting[0]["context_after"].append(stripped)
+                            waiting[1] -= 1
+                        pending = [waiting for waiting in pending if waiting[1]]
                     
                     if len(matches) >= max_results:
-                        break
+                        if not pending:
+                            break
+                    elif is_match(line):
+                        context = {
+                            "line_number": i + 1,
+                            "matching_line": stripped,
+                            "context_before": list(before),
+                            "context_after": []
+                        }
+                        
+                        matches.append(context)
+                        if context_lines > 0:
+                            pending.append([context, context_lines])
+                    
+                    before.append(stripped)
             
             return {
                 "log_path": log_path,
@@ -52,7 +52,8 @@ class ShellExecutor:
         
         env.update(env_vars)
         
-        logger.info(f"Executing command: {command} (timeout: {timeout}s, cwd: {working_dir})")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(f"Executing command: {command} (timeout: {timeout}s, cwd: {working_dir})")
         
         try:
             # Create subprocess with explicit shell
@@ -104,7 +105,8 @@ class ShellExecutor:
                 result["error_hint"] = f"Command not found: '{command.split()[0] if command.split() else command}'. Check if the command is installed and PATH is correct."
                 logger.warning(f"Command not found (return code 127): {command}")
             
-            logger.info(f"Command completed: return_code={process.returncode}")
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(f"Command completed: return_code={process.returncode}")
             return result
             
         except Exception as e:
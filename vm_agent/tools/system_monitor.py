@@ -1,22 +1,54 @@
 import psutil
 import platform
+import asyncio
+import time
 from typing import Dict, Any
 from datetime import datetime
 import logging
+from functools import lru_cache
 
 logger = logging.getLogger(__name__)
 
+# Shortest window a non-blocking CPU sample is taken over; psutil readings over
+# shorter spans are mostly noise
+CPU_SAMPLE_MIN_INTERVAL = 0.1
+
+
+@lru_cache(maxsize=1)
+def _static_info() -> Dict[str, Any]:
+    """Facts that do not change while the agent runs, looked up on first use"""
+    # platform.architecture() runs the external `file` command on each call
+    return {
+        "cpu_count": psutil.cpu_count(),
+        "platform": platform.platform(),
+        "architecture": platform.architecture()[0],
+    }
+
 class SystemMonitor:
     def __init__(self, config: Dict[str, Any]):
         self.config = config
         self.interval = config.get('interval', 60)
         
+        # Seed psutil's CPU counters so later reads can be non-blocking
+        psutil.cpu_percent(interval=None)
+        self._cpu_sampled_at = time.monotonic()
+        
     async def get_system_metrics(self) -> Dict[str, Any]:
         """Get comprehensive system metrics"""
+        # psutil calls are blocking syscalls, so collect everything as one worker-thread job
+        return await asyncio.to_thread(self._get_system_metrics_sync)
+    
+    def _get_system_metrics_sync(self) -> Dict[str, Any]:
+        """Blocking implementation of get_system_metrics"""
         try:
-            # CPU metrics
-            cpu_percent = psutil.cpu_percent(interval=1)
-            cpu_count = psutil.cpu_count()
+            # CPU metrics: usage since the previous sample instead of sleeping a
+            # full second inside psutil
+            wait = self._cpu_sampled_at + CPU_SAMPLE_MIN_INTERVAL - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            cpu_percent = psutil.cpu_percent(interval=None)
+            self._cpu_sampled_at = time.monotonic()
+            static = _static_info()
             cpu_freq = psutil.cpu_freq()
             
             # Memory metrics
@@ -36,7 +68,7 @@ class SystemMonitor:
             return {
                 "cpu": {
                     "percent": cpu_percent,
-                    "count": cpu_count,
+                    "count": static["cpu_count"],
                     "frequency": {
                         "current": cpu_freq.current if cpu_freq else None,
                         "min": cpu_freq.min if cpu_freq else None,
@@ -75,8 +107,8 @@ class SystemMonitor:
                     "packets_recv": network_io.packets_recv
                 },
                 "system": {
-                    "platform": platform.platform(),
-                    "architecture": platform.architecture()[0],
+                    "platform": static["platform"],
+                    "architecture": static["architecture"],
                     "hostname": platform.node(),
                     "boot_time": datetime.fromtimestamp(boot_time).isoformat(),
                     "uptime_seconds": datetime.now().timestamp() - boot_time
@@ -93,6 +125,11 @@ class SystemMonitor:
     
     async def get_process_list(self) -> Dict[str, Any]:
         """Get list of running processes"""
+        # Walking /proc for every process is blocking work, so it runs in a worker thread
+        return await asyncio.to_thread(self._get_process_list_sync)
+    
+    def _get_process_list_sync(self) -> Dict[str, Any]:
+        """Blocking implementation of get_process_list"""
         try:
             processes = []
             for proc in psutil.process_iter(['pid', 'name', 'username', 'cpu_percent', 'memory_percent', 'status']):
@@ -1,5 +1,4 @@
 import asyncio
-import json
 import logging
 from typing import Dict, Any, Optional, Callable
 from datetime import datetime
@@ -8,6 +7,8 @@ from aiohttp import web, WSMsgType
 import ssl
 from enum import Enum
 import os
+import time
+import orjson
 
 logger = logging.getLogger(__name__)
 
@@ -33,6 +34,12 @@ class MessageType(Enum):
     EVENT = "event"
     STREAM_OUTPUT = "stream_output"
 
+# Orchestrator tool names mapped to the agent tool and method that implement them
+TOOL_COMMANDS = {
+    "execute_shell": ("shell", "execute_command"),
+    "read_file": ("file", "read_file"),
+}
+
 class WebSocketCommandHandler:
     """Handles bidirectional WebSocket communication with orchestrator"""
     
@@ -48,6 +55,20 @@ class WebSocketCommandHandler:
         self._reconnect_delay = 5
         self._max_reconnect_delay = 300
         
+        # Switched to binary JSON frames once the orchestrator sends one, per connection
+        self._binary_frames = False
+        
+        # Outbound messages for the current connection, drained by a single writer task
+        self._outbound: Optional[asyncio.Queue] = None
+        self._outbound_maxsize = 1024
+        
+        # Bound tool methods for execute_tool commands; the agent's tool set is fixed by now
+        self._tool_dispatch: Dict[str, Callable] = {
+            tool_name: getattr(vm_agent.tools[tool_key], method_name)
+            for tool_name, (tool_key, method_name) in TOOL_COMMANDS.items()
+            if tool_key in vm_agent.tools
+        }
+        
         # Register default command handlers
         self._register_default_handlers()
     
@@ -61,13 +82,10 @@ class WebSocketCommandHandler:
             arguments = command.get("arguments", {})
             
             # Map to actual tool methods
-            if tool_name == "execute_shell" and 'shell' in self.vm_agent.tools:
-                return await self.vm_agent.tools['shell'].execute(**arguments)
-            elif tool_name == "read_file" and 'file' in self.vm_agent.tools:
-                return await self.vm_agent.tools['file'].read_file(**arguments)
-            # ... other tool mappings
-            else:
+            handler = self._tool_dispatch.get(tool_name)
+            if handler is None:
                 raise ValueError(f"Unknown tool: {tool_name}")
+            return await handler(**arguments)
         
         @self.register_handler("update_config")
         async def handle_update_config(command: Dict[str, Any]) -> Dict[str, Any]:
@@ -123,7 +141,12 @@ class WebSocketCommandHandler:
                     ws_url,
                     ssl=ssl_context,
                     headers=headers,
-                    heartbeat=30
+                    heartbeat=30,
+                    max_msg_size=self.vm_agent.config.get('orchestrator', {}).get(
+                        'max_msg_size', 4 * 1024 * 1024
+                    ),
+                    # permessage-deflate costs CPU on every frame; opt in via config
+                    compress=self.vm_agent.config.get('orchestrator', {}).get('ws_compress', 0)
                 )
                 
                 logger.info("WebSocket connection established")
@@ -131,11 +154,17 @@ class WebSocketCommandHandler:
                 # Reset reconnect delay on successful connection
                 self._reconnect_delay = 5
                 
+                self._outbound = asyncio.Queue(maxsize=self._outbound_maxsize)
+                # Text until this orchestrator sends a binary frame; the previous one
+                # may have been restarted or rolled back to a text-only build
+                self._binary_frames = False
+                
                 # Send initial heartbeat
                 await self._send_heartbeat()
                 
                 # Start background tasks
                 tasks = [
+                    asyncio.create_task(self._writer_loop()),
                     asyncio.create_task(self._handle_messages()),
                     asyncio.create_task(self._heartbeat_loop()),
                     asyncio.create_task(self._metrics_loop())
@@ -148,7 +177,8 @@ class WebSocketCommandHandler:
                 for task in pending:
                     task.cancel()
                 
-                # Clean up
+                # Clean up; anything still queued belonged to the dead connection
+                self._outbound = None
                 await session.close()
                 
             except Exception as e:
@@ -165,8 +195,12 @@ class WebSocketCommandHandler:
         """Handle incoming WebSocket messages"""
         try:
             async for msg in self._websocket:
-                if msg.type == WSMsgType.TEXT:
-                    await self._process_message(json.loads(msg.data))
+                if msg.type == WSMsgType.BINARY:
+                    # Binary frames carry raw UTF-8 JSON that orjson parses without a decode step
+                    self._binary_frames = True
+                    await self._process_message(orjson.loads(msg.data))
+                elif msg.type == WSMsgType.TEXT:
+                    await self._process_message(orjson.loads(msg.data))
                 elif msg.type == WSMsgType.ERROR:
                     logger.error(f"WebSocket error: {self._websocket.exception()}")
                     break
@@ -182,7 +216,8 @@ class WebSocketCommandHandler:
             msg_type = MessageType(message.get("type"))
             msg_id = message.get("id")
             
-            logger.debug(f"Received message: {msg_type.value} (ID: {msg_id})")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(f"Received message: {msg_type.value} (ID: {msg_id})")
             
             if msg_type == MessageType.COMMAND:
                 await self._handle_command(message)
@@ -217,7 +252,7 @@ class WebSocketCommandHandler:
         # Store active command
         self._active_commands[command_id] = {
             "status": CommandStatus.EXECUTING,
-            "start_time": datetime.utcnow(),
+            "start_time": time.monotonic(),
             "type": command_type
         }
         
@@ -249,7 +284,7 @@ class WebSocketCommandHandler:
                     "id": command_id,
                     "status": CommandStatus.COMPLETED.value,
                     "result": result,
-                    "execution_time": (datetime.utcnow() - self._active_commands[command_id]["start_time"]).total_seconds()
+                    "execution_time": time.monotonic() - self._active_commands[command_id]["start_time"]
                 })
             
             # Update status
@@ -264,7 +299,7 @@ class WebSocketCommandHandler:
                 "id": command_id,
                 "status": CommandStatus.FAILED.value,
                 "error": str(e),
-                "execution_time": (datetime.utcnow() - self._active_commands[command_id]["start_time"]).total_seconds()
+                "execution_time": time.monotonic() - self._active_commands[command_id]["start_time"]
             })
             
             # Update status
@@ -315,7 +350,7 @@ class WebSocketCommandHandler:
                 "id": command_id,
                 "status": CommandStatus.COMPLETED.value if return_code == 0 else CommandStatus.FAILED.value,
                 "result": {"return_code": return_code},
-                "execution_time": (datetime.utcnow() - self._active_commands[command_id]["start_time"]).total_seconds()
+                "execution_time": time.monotonic() - self._active_commands[command_id]["start_time"]
             })
     
     async def _handle_config_update(self, message: Dict[str, Any]):
@@ -403,8 +438,8 @@ class WebSocketCommandHandler:
         await self._send_message(heartbeat)
     
     async def _send_message(self, message: Dict[str, Any]):
-        """Send message through WebSocket"""
-        if self._websocket and not self._websocket.closed:
+        """Queue message for the WebSocket writer task"""
+        if self._websocket and not self._websocket.closed and self._outbound is not None:
             try:
                 # Add VM ID to all messages
                 message["vm_id"] = self.security_manager._vm_id
@@ -420,11 +455,34 @@ class WebSocketCommandHandler:
                         message.pop("data", None)
                         message.pop("result", None)
                 
-                await self._websocket.send_str(json.dumps(message))
+                # Blocks only when the writer has fallen a full queue behind
+                await self._outbound.put(message)
                 
             except Exception as e:
                 logger.error(f"Failed to send message: {e}")
     
+    async def _writer_loop(self):
+        """Drain the outbound queue onto the WebSocket"""
+        queue = self._outbound
+        
+        while self._websocket and not self._websocket.closed:
+            message = await queue.get()
+            try:
+                await self._write_frame(message)
+                
+                # Flush whatever queued up meanwhile without waiting for another wakeup
+                while not queue.empty():
+                    await self._write_frame(queue.get_nowait())
+            except Exception as e:
+                logger.error(f"Failed to send message: {e}")
+    
+    async def _write_frame(self, message: Dict[str, Any]):
+        """Serialize and write a single message frame"""
+        if self._binary_frames:
+            await self._websocket.send_bytes(orjson.dumps(message))
+        else:
+            await self._websocket.send_str(orjson.dumps(message).decode())
+    
     async def _send_error(self, command_id: str, error: str):
         """Send error response"""
         await self._send_message({
@@ -436,12 +494,12 @@ class WebSocketCommandHandler:
     
     async def _cleanup_commands(self):
         """Clean up old completed commands"""
-        cutoff_time = datetime.utcnow().timestamp() - 3600  # Keep for 1 hour
+        cutoff_time = time.monotonic() - 3600  # Keep for 1 hour
         
         to_remove = []
         for cmd_id, cmd_info in self._active_commands.items():
             if cmd_info["status"] in [CommandStatus.COMPLETED, CommandStatus.FAILED, CommandStatus.CANCELLED]:
-                if cmd_info["start_time"].timestamp() < cutoff_time:
+                if cmd_info["start_time"] < cutoff_time:
                     to_remove.append(cmd_id)
         
         for cmd_id in to_remove: